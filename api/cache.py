@@ -0,0 +1,232 @@
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def get_version_key(namespace):
+    return f"cache_version:{namespace}"
+
+
+def get_version(namespace):
+    """Current version of a namespace, part of every response cache key"""
+    key = get_version_key(namespace)
+    version = cache.get(key)
+
+    if version is None:
+        # Start from a timestamp, so a lost version never reuses old keys
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+
+    return version
+
+
+def bump_version(*namespaces):
+    """Invalidate all cached responses of the given namespaces"""
+    for namespace in namespaces:
+        try:
+            cache.incr(get_version_key(namespace))
+        except ValueError:
+            get_version(namespace)
+
+
+def get_object_namespace(namespace, pk):
+    return f"{namespace}:{pk}"
+
+
+def bump_objects(namespace, pks):
+    """Invalidate the cached detail responses of single objects"""
+    # Dropped versions restart from a new timestamp, in one round trip
+    cache.delete_many(
+        [
+            get_version_key(get_object_namespace(namespace, pk))
+            for pk in set(pks)
+        ]
+    )
+
+
+class CacheInvalidationMixin:
+    """Bump the versions of cached namespaces after every write"""
+
+    invalidated_namespaces = ()
+
+    def invalidate_cache(self):
+        transaction.on_commit(
+            lambda: bump_version(*self.invalidated_namespaces)
+        )
+
+    def perform_create(self, serializer, *args, **kwargs):
+        instance = super().perform_create(serializer, *args, **kwargs)
+        self.invalidate_cache()
+
+        return instance
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        self.invalidate_cache()
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        self.invalidate_cache()
+
+
+class CachedResponseMixin:
+    """
+    Cache list and retrieve responses per normalized query params and
+    visibility scope. Cached responses are dropped by bumping the
+    version of the viewset namespace whenever the underlying rows change.
+    Detail responses are also versioned per object, so that writes to
+    the relations of one object only drop its own detail response, list
+    responses then lag behind by up to RESPONSE_CACHE_TIMEOUT. Fields
+    that differ per user are added after the cache lookup.
+    Responses carry an ETag, so that conditional requests of unchanged
+    resources are answered with 304 Not Modified. No Last-Modified is
+    sent, as the latest updated_at misses deleted rows and changes of
+    nested objects.
+    """
+
+    cache_namespace = None
+    cache_actions = ("list", "retrieve")
+
+    def get_cache_scope(self):
+        """Part of the key separating responses that differ per user"""
+        return "public"
+
+    def get_cache_key(self, request, *args, **kwargs):
+        query_params = "&".join(
+            f"{name}={value}"
+            for name, values in sorted(request.query_params.lists())
+            for value in sorted(values)
+        )
+        raw_key = "|".join(
+            [
+                request.get_host(),
+                self.action,
+                str(kwargs.get(self.lookup_url_kwarg or self.lookup_field)),
+                self.get_cache_scope(),
+                query_params,
+            ]
+        )
+        digest = hashlib.md5(raw_key.encode()).hexdigest()
+        version = get_version(self.cache_namespace)
+
+        if self.action == "retrieve":
+            object_namespace = get_object_namespace(
+                self.cache_namespace,
+                kwargs[self.lookup_url_kwarg or self.lookup_field],
+            )
+            version = f"{version}.{get_version(object_namespace)}"
+
+        return f"response:{self.cache_namespace}:{version}:{digest}"
+
+    def get_etag(self, cache_key, *args, **kwargs):
+        """
+        Return the ETag of the requested rows, computed from an aggregate
+        instead of the serialized response. The row count catches deleted
+        rows, the cache key the bumped versions of nested objects.
+        """
+        queryset = self.filter_queryset(self.get_queryset()).order_by()
+
+        if self.action == "retrieve":
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            queryset = queryset.filter(
+                **{self.lookup_field: kwargs[lookup_url_kwarg]}
+            )
+
+        aggregate = queryset.aggregate(
+            last_modified=Max("updated_at"), count=Count("pk")
+        )
+        last_modified = aggregate["last_modified"]
+
+        raw_etag = "|".join(
+            [
+                cache_key,
+                self.request.accepted_media_type,
+                str(last_modified and last_modified.timestamp()),
+                str(aggregate["count"]),
+            ]
+        )
+
+        return quote_etag(hashlib.md5(raw_etag.encode()).hexdigest())
+
+    def get_viewer_fields(self, items):
+        """
+        Return {id: fields} of the serialized items for the requesting
+        user, added to the cached response which is shared by all users
+        """
+        return {}
+
+    @staticmethod
+    def get_items(data):
+        if isinstance(data, list):
+            return data
+
+        return data["results"] if "results" in data else [data]
+
+    @staticmethod
+    def add_viewer_fields(data, viewer_fields):
+        """Return a copy of the cached data with the viewer fields added"""
+
+        def add(item):
+            return {**item, **viewer_fields.get(item["id"], {})}
+
+        if isinstance(data, list):
+            return [add(item) for item in data]
+
+        if "results" in data:
+            return {**data, "results": [add(item) for item in data["results"]]}
+
+        return add(data)
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        if self.action not in self.cache_actions:
+            return handler(request, *args, **kwargs)
+
+        key = self.get_cache_key(request, *args, **kwargs)
+        cached = cache.get(key)
+
+        if cached is None:
+            response = handler(request, *args, **kwargs)
+
+            if response.status_code != status.HTTP_200_OK:
+                return response
+
+            cached = (response.data, self.get_etag(key, *args, **kwargs))
+            cache.set(key, cached, settings.RESPONSE_CACHE_TIMEOUT)
+
+        data, etag = cached
+        viewer_fields = self.get_viewer_fields(self.get_items(data))
+
+        if viewer_fields:
+            raw_etag = f"{etag}|{json.dumps(viewer_fields, sort_keys=True)}"
+            etag = quote_etag(hashlib.md5(raw_etag.encode()).hexdigest())
+
+        not_modified = get_conditional_response(request, etag=etag)
+
+        if not_modified is not None:
+            not_modified["ETag"] = etag
+            return not_modified
+
+        if viewer_fields:
+            data = self.add_viewer_fields(data, viewer_fields)
+
+        response = Response(data)
+        response["ETag"] = etag
+
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
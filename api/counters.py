@@ -0,0 +1,16 @@
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_rows(queryset, field, outer_field="pk"):
+    """Correlated subquery counting the rows that reference the outer row"""
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef(outer_field)})
+            .order_by()
+            .values(field)
+            .annotate(count=Count("pk"))
+            .values("count")
+        ),
+        0,
+    )
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from post import feed
+
+
+class Command(BaseCommand):
+    """
+    Fills the home timelines from the existing follows. Run it once after
+    migrating a database whose follows predate the timelines, later follows
+    and posts are fanned out by the API.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of timeline entries inserted in one query",
+        )
+
+    def handle(self, *args, **options):
+        created = feed.backfill_all(options["batch_size"])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"{created} timeline entries written")
+        )
@@ -0,0 +1,476 @@
+import json
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from io import StringIO
+from itertools import count
+from pathlib import Path
+from unittest import mock
+from uuid import uuid4
+
+import fakeredis
+import redis
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.backends.utils import CursorWrapper
+from django.test.utils import (
+    CaptureQueriesContext,
+    override_settings,
+    setup_databases,
+    teardown_databases,
+)
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+from api.redis_client import get_redis
+from post.models import HashTag, Post
+from user.serializers import TokenObtainPairSerializer
+from user_profile.models import UserProfile, UserProfileFollow
+
+
+@contextmanager
+def count_fetched_rows():
+    """Count rows fetched through Django database cursors"""
+    fetched = {"rows": 0}
+
+    def fetchone(self):
+        row = self.cursor.fetchone()
+        fetched["rows"] += row is not None
+        return row
+
+    def fetchmany(self, *args):
+        rows = self.cursor.fetchmany(*args)
+        fetched["rows"] += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self.cursor.fetchall()
+        fetched["rows"] += len(rows)
+        return rows
+
+    with mock.patch.multiple(
+        CursorWrapper,
+        create=True,
+        fetchone=fetchone,
+        fetchmany=fetchmany,
+        fetchall=fetchall,
+    ):
+        yield fetched
+
+
+# Tokens are issued with the signed user claims, as by the token endpoint
+get_token = TokenObtainPairSerializer.get_token
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    index = max(0, round(percent / 100 * len(ordered)) - 1)
+
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    """
+    Seeds a synthetic dataset into a throwaway test database and measures
+    latency, SQL queries and fetched rows of every API endpoint
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=2000)
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--baseline",
+            default=str(settings.BASE_DIR / "benchmark_baseline.json"),
+            help="JSON file with the results the run is compared against",
+        )
+        parser.add_argument(
+            "--update-baseline",
+            action="store_true",
+            help="Store the results of this run as the new baseline",
+        )
+        parser.add_argument(
+            "--latency-tolerance",
+            type=float,
+            default=2.0,
+            help="Allowed p99 latency growth factor over the baseline",
+        )
+
+    def handle(self, *args, **options):
+        old_config = setup_databases(verbosity=0, interactive=False)
+        get_redis.cache_clear()
+
+        try:
+            # Without a cache every request measures the database work, and
+            # an in-process Redis keeps the results independent of a server
+            with override_settings(
+                ALLOWED_HOSTS=["testserver"],
+                CACHES={
+                    "default": {
+                        "BACKEND": (
+                            "django.core.cache.backends.dummy.DummyCache"
+                        )
+                    }
+                },
+            ), mock.patch.object(
+                APIView, "throttle_classes", []
+            ), mock.patch.object(
+                redis.Redis,
+                "from_url",
+                return_value=fakeredis.FakeRedis(decode_responses=True),
+            ):
+                call_command(
+                    "seed_data",
+                    users=options["users"],
+                    seed=options["seed"],
+                    password="benchmark",
+                    stdout=StringIO(),
+                )
+                results = self.run_endpoints(options["iterations"])
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            get_redis.cache_clear()
+
+        self.report(results)
+
+        baseline_path = Path(options["baseline"])
+
+        if options["update_baseline"]:
+            baseline_path.write_text(json.dumps(results, indent=4) + "\n")
+            self.stdout.write(
+                self.style.SUCCESS(f"Baseline stored in {baseline_path}")
+            )
+            return
+
+        if not baseline_path.exists():
+            self.stdout.write(
+                self.style.WARNING(f"No baseline found in {baseline_path}")
+            )
+            return
+
+        regressions = self.compare(
+            results,
+            json.loads(baseline_path.read_text()),
+            options["latency_tolerance"],
+        )
+
+        if regressions:
+            raise CommandError(
+                "Benchmark regressions:\n" + "\n".join(regressions)
+            )
+
+        self.stdout.write(self.style.SUCCESS("No regressions found"))
+
+    def get_endpoints(self):
+        """Return (name, method, url, payload factory) of every endpoint"""
+        profile = (
+            UserProfile.objects.select_related("created_by")
+            .order_by("-followings_count", "id")
+            .first()
+        )
+        user = profile.created_by
+        post = Post.objects.order_by("-likes_count", "id").first()
+        emails = (f"new{i}@example.com" for i in count())
+        batch_post_ids = list(
+            Post.objects.order_by("-likes_count", "id")[:100].values_list(
+                "id", flat=True
+            )
+        )
+
+        def refresh_token():
+            return {"refresh": str(get_token(user))}
+
+        def outstanding_tokens():
+            """Give the user 10k outstanding tokens, none blacklisted"""
+            missing = 10000 - user.outstandingtoken_set.count()
+            expires_at = timezone.now() + timedelta(days=1)
+            OutstandingToken.objects.bulk_create(
+                OutstandingToken(
+                    user=user,
+                    jti=uuid4().hex,
+                    token="",
+                    expires_at=expires_at,
+                )
+                for _ in range(missing)
+            )
+            BlacklistedToken.objects.filter(token__user=user).delete()
+
+        return user, [
+            ("post-root", "get", reverse("api:post:api-root"), None),
+            (
+                "hash_tags-list",
+                "get",
+                reverse("api:post:hashtag-list"),
+                None,
+            ),
+            (
+                "hash_tags-detail",
+                "get",
+                reverse(
+                    "api:post:hashtag-detail",
+                    args=[HashTag.objects.first().id],
+                ),
+                None,
+            ),
+            ("likes-list", "get", reverse("api:post:like-list"), None),
+            (
+                "likes-detail",
+                "get",
+                reverse("api:post:like-detail", args=[post.likes.first().id]),
+                None,
+            ),
+            (
+                "likes-batch",
+                "post",
+                reverse("api:post:like-batch"),
+                lambda: {"like": batch_post_ids},
+            ),
+            ("comments-list", "get", reverse("api:post:comment-list"), None),
+            (
+                "comments-list-cursor",
+                "get",
+                reverse("api:post:comment-list") + "?pagination=cursor",
+                None,
+            ),
+            (
+                "comments-detail",
+                "get",
+                reverse(
+                    "api:post:comment-detail",
+                    args=[post.comments.first().id],
+                ),
+                None,
+            ),
+            (
+                "comments-thread",
+                "get",
+                reverse(
+                    "api:post:comment-thread",
+                    args=[post.comments.first().id],
+                ),
+                None,
+            ),
+            ("posts-list", "get", reverse("api:post:post-list"), None),
+            (
+                "posts-list-cursor",
+                "get",
+                reverse("api:post:post-list") + "?pagination=cursor",
+                None,
+            ),
+            (
+                "posts-list-filtered",
+                "get",
+                reverse("api:post:post-list") + "?title=post&hashtags=1,2",
+                None,
+            ),
+            (
+                "posts-list-tags",
+                "get",
+                reverse("api:post:post-list") + "?tags=tag1,tag2&tag_mode=any",
+                None,
+            ),
+            (
+                "posts-search",
+                "get",
+                reverse("api:post:post-list") + "?q=synthetic post",
+                None,
+            ),
+            (
+                "posts-detail",
+                "get",
+                reverse("api:post:post-detail", args=[post.id]),
+                None,
+            ),
+            (
+                "posts-likes",
+                "get",
+                reverse("api:post:post-likes", args=[post.id]),
+                None,
+            ),
+            (
+                "posts-comments",
+                "get",
+                reverse("api:post:post-comments", args=[post.id]),
+                None,
+            ),
+            ("posts-feed", "get", reverse("api:post:post-feed"), None),
+            (
+                "user-profile-root",
+                "get",
+                reverse("api:user-profile:api-root"),
+                None,
+            ),
+            (
+                "user_profiles-list",
+                "get",
+                reverse("api:user-profile:userprofile-list"),
+                None,
+            ),
+            (
+                "user_profiles-list-cursor",
+                "get",
+                reverse("api:user-profile:userprofile-list")
+                + "?pagination=cursor",
+                None,
+            ),
+            (
+                "user_profiles-detail",
+                "get",
+                reverse(
+                    "api:user-profile:userprofile-detail",
+                    args=[profile.id],
+                ),
+                None,
+            ),
+            (
+                "user_profiles-posts",
+                "get",
+                reverse(
+                    "api:user-profile:userprofile-posts",
+                    args=[profile.id],
+                ),
+                None,
+            ),
+            (
+                "user_profile_follows-list",
+                "get",
+                reverse("api:user-profile:userprofilefollow-list"),
+                None,
+            ),
+            (
+                "user_profile_follows-detail",
+                "get",
+                reverse(
+                    "api:user-profile:userprofilefollow-detail",
+                    args=[UserProfileFollow.objects.first().id],
+                ),
+                None,
+            ),
+            (
+                "user-register",
+                "post",
+                reverse("api:user:create"),
+                lambda: {"email": next(emails), "password": "benchmark"},
+            ),
+            (
+                "user-token",
+                "post",
+                reverse("api:user:token_obtain_pair"),
+                lambda: {"email": user.email, "password": "benchmark"},
+            ),
+            (
+                "user-token-refresh",
+                "post",
+                reverse("api:user:token_refresh"),
+                refresh_token,
+            ),
+            (
+                "user-token-verify",
+                "post",
+                reverse("api:user:token_verify"),
+                lambda: {"token": str(get_token(user))},
+            ),
+            ("user-me", "get", reverse("api:user:manage"), None),
+            (
+                "user-logout",
+                "post",
+                reverse("api:user:auth_logout"),
+                lambda: {"refresh_token": refresh_token()["refresh"]},
+            ),
+            (
+                "user-logout-all",
+                "post",
+                reverse("api:user:auth_logout_all"),
+                None,
+            ),
+            (
+                "user-logout-all-10k",
+                "post",
+                reverse("api:user:auth_logout_all"),
+                outstanding_tokens,
+            ),
+        ]
+
+    def run_endpoints(self, iterations):
+        user, endpoints = self.get_endpoints()
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {get_token(user).access_token}"
+        )
+
+        results = {}
+
+        for name, method, url, payload in endpoints:
+            timings = []
+
+            # The first request warms up caches and is not measured
+            for _ in range(iterations + 1):
+                data = payload() if payload else None
+
+                with CaptureQueriesContext(
+                    connection
+                ) as queries, count_fetched_rows() as fetched:
+                    start = time.perf_counter()
+                    response = getattr(client, method)(
+                        url, data, format="json"
+                    )
+                    timings.append((time.perf_counter() - start) * 1000)
+
+                if response.status_code >= 400:
+                    raise CommandError(
+                        f"{name} responded with {response.status_code}: "
+                        f"{response.content[:200]}"
+                    )
+
+            results[name] = {
+                "p50_ms": round(percentile(timings[1:], 50), 2),
+                "p99_ms": round(percentile(timings[1:], 99), 2),
+                "queries": len(queries),
+                "rows": fetched["rows"],
+            }
+
+        return results
+
+    def report(self, results):
+        self.stdout.write(
+            f"{'endpoint':<32}{'p50 ms':>10}{'p99 ms':>10}"
+            f"{'queries':>10}{'rows':>10}"
+        )
+
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<32}{result['p50_ms']:>10}{result['p99_ms']:>10}"
+                f"{result['queries']:>10}{result['rows']:>10}"
+            )
+
+    @staticmethod
+    def compare(results, baseline, latency_tolerance):
+        regressions = []
+
+        for name, result in results.items():
+            expected = baseline.get(name)
+
+            if expected is None:
+                continue
+
+            for metric in ("queries", "rows"):
+                if result[metric] > expected[metric]:
+                    regressions.append(
+                        f"{name}: {metric} {result[metric]} "
+                        f"> {expected[metric]}"
+                    )
+
+            if result["p99_ms"] > expected["p99_ms"] * latency_tolerance:
+                regressions.append(
+                    f"{name}: p99 {result['p99_ms']} ms "
+                    f"> {expected['p99_ms']} ms x {latency_tolerance}"
+                )
+
+        return regressions
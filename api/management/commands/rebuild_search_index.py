@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from post import search
+from post.models import Post
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds the full-text search index of all posts. Run it after
+    migrating an existing database and after bulk imports, which bypass
+    the API that keeps the index up to date.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of posts indexed in one transaction",
+        )
+
+    def handle(self, *args, **options):
+        search.clear_index()
+
+        indexed = 0
+        last_pk = 0
+
+        while True:
+            pks = list(
+                Post.objects.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .values_list("pk", flat=True)[: options["batch_size"]]
+            )
+
+            if not pks:
+                break
+
+            last_pk = pks[-1]
+
+            with transaction.atomic():
+                search.update_index(pks)
+
+            indexed += len(pks)
+
+        self.stdout.write(self.style.SUCCESS(f"{indexed} posts indexed"))
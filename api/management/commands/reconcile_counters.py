@@ -0,0 +1,83 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Q
+
+from api.cache import bump_version
+from api.counters import count_rows
+from post.models import Comment, Like, Post
+from user_profile.models import UserProfile, UserProfileFollow
+
+
+class Command(BaseCommand):
+    """Recalculates denormalized counters that drifted from the actual rows"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rows recalculated in one transaction",
+        )
+
+    def handle(self, *args, **options):
+        fixed = self.reconcile(
+            Post.objects.all(),
+            {
+                "likes_count": count_rows(Like.objects.all(), "post"),
+                "comments_count": count_rows(Comment.objects.all(), "post"),
+            },
+            options["batch_size"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"{fixed} posts reconciled"))
+
+        follows = UserProfileFollow.objects.all()
+        fixed = self.reconcile(
+            UserProfile.objects.all(),
+            {
+                "followers_count": count_rows(
+                    follows, "following", "created_by"
+                ),
+                "followings_count": count_rows(
+                    follows, "created_by", "created_by"
+                ),
+                "posts_count": count_rows(Post.objects.all(), "profile"),
+            },
+            options["batch_size"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"{fixed} user profiles reconciled")
+        )
+
+        bump_version("post", "user_profile")
+
+    @staticmethod
+    def reconcile(queryset, counters, batch_size):
+        """Fix drifted counters in primary key batches, return their count"""
+        actual = {f"actual_{field}": expr for field, expr in counters.items()}
+        drifted = Q()
+        for field in counters:
+            drifted |= ~Q(**{field: F(f"actual_{field}")})
+
+        fixed = 0
+        last_pk = 0
+
+        while True:
+            pks = list(
+                queryset.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+
+            if not pks:
+                return fixed
+
+            last_pk = pks[-1]
+
+            with transaction.atomic():
+                drifted_pks = list(
+                    queryset.filter(pk__in=pks)
+                    .annotate(**actual)
+                    .filter(drifted)
+                    .values_list("pk", flat=True)
+                )
+                fixed += queryset.filter(pk__in=drifted_pks).update(**counters)
@@ -0,0 +1,320 @@
+import random
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import CharField, Value
+from django.db.models.functions import Cast, LPad
+
+from post import hashtags
+from post.models import Comment, HashTag, Like, Post
+from user.models import User
+from user_profile.models import UserProfile, UserProfileFollow
+
+
+def power_law(size, exponent):
+    """Cumulative weights picking the item of rank r ~ 1 / r^exponent"""
+    return list(accumulate(1 / rank**exponent for rank in range(1, size + 1)))
+
+
+class Command(BaseCommand):
+    """
+    Bulk creates a deterministic synthetic dataset for load testing.
+    Users, follows, posts, hashtags, likes and comments are inserted with
+    bulk_create in batches, popularity of users and posts follows a
+    power law and the same --seed always produces the same data.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument(
+            "--follows-per-user",
+            type=float,
+            default=20,
+            help="Mean number of users each user follows",
+        )
+        parser.add_argument(
+            "--follow-exponent",
+            type=float,
+            default=1.0,
+            help="Power law exponent of the follower distribution",
+        )
+        parser.add_argument(
+            "--posts-per-user",
+            type=float,
+            default=5,
+            help="Mean number of posts of each user",
+        )
+        parser.add_argument("--hashtags", type=int, default=500)
+        parser.add_argument(
+            "--likes-per-user",
+            type=float,
+            default=20,
+            help="Mean number of posts each user likes",
+        )
+        parser.add_argument(
+            "--like-exponent",
+            type=float,
+            default=1.0,
+            help="Power law exponent of the like distribution",
+        )
+        parser.add_argument(
+            "--comments-per-post",
+            type=float,
+            default=2,
+            help="Mean number of comments of each post",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--password",
+            default="password",
+            help="Password shared by all seeded users",
+        )
+        parser.add_argument(
+            "--skip-timelines",
+            action="store_true",
+            help="Do not fill the home timelines from the follows",
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.email_domain = f"seed{options['seed']}.example.com"
+
+        if User.objects.filter(email__endswith=self.email_domain).exists():
+            raise CommandError(
+                f"Data for seed {options['seed']} already exists, "
+                f"use another --seed"
+            )
+
+        user_ids = self.create_users(options["users"], options["password"])
+        profile_ids = self.create_profiles(user_ids)
+        self.create_follows(
+            user_ids, options["follows_per_user"], options["follow_exponent"]
+        )
+        hashtag_ids = self.create_hashtags(options["hashtags"])
+        post_ids = self.create_posts(
+            user_ids, profile_ids, hashtag_ids, options["posts_per_user"]
+        )
+        self.create_likes(
+            user_ids,
+            post_ids,
+            options["likes_per_user"],
+            options["like_exponent"],
+        )
+        self.create_comments(user_ids, post_ids, options["comments_per_post"])
+
+        call_command(
+            "reconcile_counters",
+            batch_size=self.batch_size,
+            stdout=self.stdout,
+        )
+        call_command(
+            "rebuild_search_index",
+            batch_size=self.batch_size,
+            stdout=self.stdout,
+        )
+
+        if not options["skip_timelines"]:
+            call_command(
+                "backfill_timelines",
+                batch_size=self.batch_size,
+                stdout=self.stdout,
+            )
+
+        self.stdout.write(self.style.SUCCESS("Synthetic data created"))
+
+    def bulk_create(self, model, objs, **kwargs):
+        """Insert objects of a generator in batches, return their count"""
+        created = 0
+        batch = []
+
+        for obj in objs:
+            batch.append(obj)
+
+            if len(batch) >= self.batch_size:
+                model.objects.bulk_create(batch, **kwargs)
+                created += len(batch)
+                batch = []
+
+        model.objects.bulk_create(batch, **kwargs)
+        created += len(batch)
+
+        self.stdout.write(f"{created} {model._meta.verbose_name_plural}")
+
+        return created
+
+    def count(self, mean):
+        return int(self.rng.expovariate(1 / mean)) if mean > 0 else 0
+
+    def create_users(self, users_count, password):
+        # Every user gets the same hash, so it is computed only once
+        password = make_password(password)
+
+        self.bulk_create(
+            User,
+            (
+                User(
+                    email=f"user{i}@{self.email_domain}",
+                    username=f"user{i}@{self.email_domain}",
+                    first_name=f"First{i}",
+                    last_name=f"Last{i}",
+                    password=password,
+                )
+                for i in range(users_count)
+            ),
+        )
+
+        return list(
+            User.objects.filter(email__endswith=self.email_domain)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+
+    def create_profiles(self, user_ids):
+        self.bulk_create(
+            UserProfile,
+            (
+                UserProfile(created_by_id=user_id, bio=f"Bio of {user_id}")
+                for user_id in user_ids
+            ),
+        )
+
+        return dict(
+            UserProfile.objects.filter(
+                created_by__email__endswith=self.email_domain
+            )
+            .values_list("created_by_id", "id")
+            .iterator()
+        )
+
+    def create_follows(self, user_ids, follows_per_user, exponent):
+        cum_weights = power_law(len(user_ids), exponent)
+
+        def follows():
+            for user_id in user_ids:
+                following_ids = set(
+                    self.rng.choices(
+                        user_ids,
+                        cum_weights=cum_weights,
+                        k=self.count(follows_per_user),
+                    )
+                )
+                following_ids.discard(user_id)
+
+                for following_id in sorted(following_ids):
+                    yield UserProfileFollow(
+                        created_by_id=user_id, following_id=following_id
+                    )
+
+        self.bulk_create(UserProfileFollow, follows(), ignore_conflicts=True)
+
+    def create_hashtags(self, hashtags_count):
+        names = [f"tag{i}" for i in range(hashtags_count)]
+
+        self.bulk_create(
+            HashTag,
+            (HashTag(name=name) for name in names),
+            ignore_conflicts=True,
+        )
+
+        return dict(
+            HashTag.objects.filter(name__in=names).values_list("name", "id")
+        )
+
+    def get_content(self, i, user_id, names):
+        """Text of a synthetic post ending with up to 3 hashtags"""
+        text = f"Synthetic post {i} of user {user_id}"
+
+        if not names:
+            return text
+
+        tags = sorted(set(self.rng.choices(names, k=self.rng.randint(0, 3))))
+
+        return " ".join([text] + [f"#{name}" for name in tags])
+
+    def create_posts(self, user_ids, profile_ids, hashtag_ids, posts_per_user):
+        # Hashtags are attached by the post serializer, not on save, so the
+        # seeded posts link exactly the hashtags written in their content
+        names = sorted(hashtag_ids)
+
+        self.bulk_create(
+            Post,
+            (
+                Post(
+                    created_by_id=user_id,
+                    profile_id=profile_ids[user_id],
+                    title=f"Post {i} of user {user_id}",
+                    content=self.get_content(i, user_id, names),
+                )
+                for user_id in user_ids
+                for i in range(self.count(posts_per_user))
+            ),
+        )
+
+        posts = list(
+            Post.objects.filter(created_by__email__endswith=self.email_domain)
+            .order_by("id")
+            .values_list("id", "content")
+            .iterator()
+        )
+
+        self.bulk_create(
+            Post.hashtags.through,
+            (
+                Post.hashtags.through(
+                    post_id=post_id, hashtag_id=hashtag_ids[name]
+                )
+                for post_id, content in posts
+                for name in hashtags.parse(content)
+                if name in hashtag_ids
+            ),
+            ignore_conflicts=True,
+        )
+
+        return [post_id for post_id, _ in posts]
+
+    def create_likes(self, user_ids, post_ids, likes_per_user, exponent):
+        if not post_ids:
+            return
+
+        cum_weights = power_law(len(post_ids), exponent)
+
+        def likes():
+            for user_id in user_ids:
+                liked_ids = set(
+                    self.rng.choices(
+                        post_ids,
+                        cum_weights=cum_weights,
+                        k=self.count(likes_per_user),
+                    )
+                )
+
+                for post_id in sorted(liked_ids):
+                    yield Like(post_id=post_id, created_by_id=user_id)
+
+        self.bulk_create(Like, likes(), ignore_conflicts=True)
+
+    def create_comments(self, user_ids, post_ids, comments_per_post):
+        self.bulk_create(
+            Comment,
+            (
+                Comment(
+                    post_id=post_id,
+                    created_by_id=self.rng.choice(user_ids),
+                    content=f"Synthetic comment {i} on post {post_id}",
+                )
+                for post_id in post_ids
+                for i in range(self.count(comments_per_post))
+            ),
+        )
+        # Seeded comments are roots, so their path is their padded id
+        Comment.objects.filter(path="").update(
+            path=LPad(
+                Cast("id", output_field=CharField()),
+                Comment.PATH_STEP,
+                Value("0"),
+            )
+        )
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from redis import RedisError
+
+from user import blacklist
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds the Redis cache of blacklisted JWTs from the blacklist
+    tables. Run it on startup, until then token lookups fall back to
+    the database.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of tokens written to Redis in one round trip",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            count = blacklist.warm(options["batch_size"])
+        except RedisError as error:
+            # Not fatal, lookups keep going to the database meanwhile
+            self.stderr.write(f"Blacklisted tokens not cached: {error}")
+            return
+
+        self.stdout.write(
+            self.style.SUCCESS(f"{count} blacklisted tokens cached")
+        )
@@ -0,0 +1,41 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db.migrations import AddIndex
+
+
+class PostgresAddIndex(AddIndex):
+    """
+    Index created only on PostgreSQL, for index types other databases do
+    not support. It is kept out of the model state, so that the models
+    stay usable on every database.
+    """
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def database_forwards(
+        self, app_label, schema_editor, from_state, to_state
+    ):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_forwards(
+                app_label, schema_editor, from_state, to_state
+            )
+
+    def database_backwards(
+        self, app_label, schema_editor, from_state, to_state
+    ):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_backwards(
+                app_label, schema_editor, from_state, to_state
+            )
+
+
+class PostgresTrigramExtension(TrigramExtension):
+    """TrigramExtension that can also be unapplied on other databases"""
+
+    def database_backwards(
+        self, app_label, schema_editor, from_state, to_state
+    ):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_backwards(
+                app_label, schema_editor, from_state, to_state
+            )
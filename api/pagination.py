@@ -0,0 +1,113 @@
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Keyset pagination on (created_at, id) without a total count. The
+    cursor holds both values of the boundary row, so rows with an equal
+    timestamp are paged by id instead of an offset.
+    """
+
+    page_size = 3
+    max_page_size = 100
+    ordering = ("-created_at", "-id")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+
+        if self.cursor is None:
+            offset, reverse, current_position = 0, False, None
+        else:
+            offset, reverse, current_position = self.cursor
+
+        # Newest first, a reverse cursor walks back towards newer rows
+        lookup = "gt" if reverse else "lt"
+        queryset = queryset.order_by(
+            *(("created_at", "id") if reverse else self.ordering)
+        )
+
+        if current_position is not None:
+            created_at, pk = self.parse_position(current_position)
+            queryset = queryset.filter(
+                Q(**{f"created_at__{lookup}": created_at})
+                | Q(created_at=created_at, **{f"id__{lookup}": pk})
+            )
+
+        results = list(queryset[offset : offset + self.page_size + 1])
+        self.page = results[: self.page_size]
+
+        if len(results) > len(self.page):
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering
+            )
+        else:
+            following_position = None
+
+        has_current = current_position is not None or offset > 0
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = has_current
+            self.has_previous = following_position is not None
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next = following_position is not None
+            self.has_previous = has_current
+            self.next_position = following_position
+            self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def parse_position(self, position):
+        try:
+            created_at, pk = position.split("|")
+            return datetime.fromisoformat(created_at), int(pk)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+    def _get_position_from_instance(self, instance, ordering):
+        return f"{instance.created_at.isoformat()}|{instance.pk}"
+
+
+class CursorPaginationMixin:
+    """
+    Switch list actions to keyset pagination with ?pagination=cursor.
+    Next/previous links carry the cursor, so deep pages cost the same
+    as the first one.
+    """
+
+    cursor_pagination_class = CreatedAtCursorPagination
+    cursor_pagination_actions = ("list",)
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator") and self.is_cursor_paginated():
+            self._paginator = self.cursor_pagination_class()
+
+        return super().paginator
+
+    def is_cursor_paginated(self):
+        if self.action not in self.cursor_pagination_actions:
+            return False
+
+        query_params = self.request.query_params
+        cursor_query_param = self.cursor_pagination_class.cursor_query_param
+
+        return (
+            query_params.get("pagination") == "cursor"
+            or cursor_query_param in query_params
+        )
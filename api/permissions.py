@@ -1,14 +1,26 @@
 from rest_framework.permissions import BasePermission
 
 
-class IsOwnerOrReadOnly(BasePermission):
+class OwnerPermission(BasePermission):
+    """
+    Grant access to the author of an object. Ownership is decided on
+    created_by_id, so the author row is never loaded.
+    """
+
+    owner_field = "created_by_id"
+    # Methods granted to every user on every object
+    public_methods = ()
+
     def has_object_permission(self, request, view, obj):
         return bool(
-            obj.created_by == request.user
-            or request.method in ("GET", "HEAD", "OPTIONS", "POST")
+            request.method in self.public_methods
+            or getattr(obj, self.owner_field) == request.user.id
         )
 
 
-class IsOwnerOnly(BasePermission):
-    def has_object_permission(self, request, view, obj):
-        return bool(obj.created_by == request.user)
+class IsOwnerOrReadOnly(OwnerPermission):
+    public_methods = ("GET", "HEAD", "OPTIONS", "POST")
+
+
+class IsOwnerOnly(OwnerPermission):
+    pass
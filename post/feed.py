@@ -0,0 +1,211 @@
+import heapq
+
+from django.conf import settings
+from django.db.models import Q
+
+from post.models import Post, TimelineEntry
+from user_profile.models import UserProfile, UserProfileFollow
+
+
+def is_fan_out_on_read(author_id):
+    """Authors with too many followers are merged into feeds on read"""
+    return UserProfile.objects.filter(
+        created_by_id=author_id,
+        followers_count__gte=settings.FEED_FANOUT_FOLLOWER_LIMIT,
+    ).exists()
+
+
+def get_fan_out_on_read_ids(user_id):
+    return list(
+        UserProfileFollow.objects.filter(
+            created_by_id=user_id,
+            following__userprofile__followers_count__gte=(
+                settings.FEED_FANOUT_FOLLOWER_LIMIT
+            ),
+        ).values_list("following_id", flat=True)
+    )
+
+
+def fan_out(post_id, batch_size=1000):
+    """Push a visible post into the timelines of its author's followers"""
+    post = (
+        Post.objects.filter(pk=post_id, is_visible=True)
+        .only("id", "created_at", "created_by_id")
+        .first()
+    )
+
+    if post is None or is_fan_out_on_read(post.created_by_id):
+        return 0
+
+    follower_ids = (
+        UserProfileFollow.objects.filter(following_id=post.created_by_id)
+        .values_list("created_by_id", flat=True)
+        .iterator(chunk_size=batch_size)
+    )
+
+    return _insert_entries(
+        (
+            TimelineEntry(
+                owner_id=follower_id,
+                post_id=post.id,
+                created_at=post.created_at,
+            )
+            for follower_id in follower_ids
+        ),
+        batch_size,
+    )
+
+
+def _insert_entries(entries, batch_size):
+    """Bulk create the timeline entries of a generator in batches"""
+    batch = []
+    created = 0
+
+    for entry in entries:
+        batch.append(entry)
+
+        if len(batch) >= batch_size:
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            created += len(batch)
+            batch = []
+
+    TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+    return created + len(batch)
+
+
+def backfill(owner_id, author_id):
+    """Copy the latest posts of a newly followed author into a timeline"""
+    if is_fan_out_on_read(author_id):
+        return 0
+
+    posts = Post.objects.filter(
+        created_by_id=author_id, is_visible=True
+    ).order_by("-created_at", "-id")[: settings.FEED_BACKFILL_SIZE]
+    entries = TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(
+                owner_id=owner_id, post_id=post_id, created_at=created_at
+            )
+            for post_id, created_at in posts.values_list("id", "created_at")
+        ],
+        ignore_conflicts=True,
+    )
+
+    return len(entries)
+
+
+def backfill_all(batch_size=1000):
+    """
+    Copy the latest posts of every followed author into the timelines of
+    its followers, for follows made before the timelines were filled
+    """
+    author_ids = list(
+        UserProfileFollow.objects.exclude(
+            following__userprofile__followers_count__gte=(
+                settings.FEED_FANOUT_FOLLOWER_LIMIT
+            )
+        )
+        .order_by("following_id")
+        .values_list("following_id", flat=True)
+        .distinct()
+    )
+    created = 0
+
+    for author_id in author_ids:
+        posts = list(
+            Post.objects.filter(created_by_id=author_id, is_visible=True)
+            .order_by("-created_at", "-id")
+            .values_list("id", "created_at")[: settings.FEED_BACKFILL_SIZE]
+        )
+
+        if not posts:
+            continue
+
+        follower_ids = (
+            UserProfileFollow.objects.filter(following_id=author_id)
+            .values_list("created_by_id", flat=True)
+            .iterator(chunk_size=batch_size)
+        )
+        created += _insert_entries(
+            (
+                TimelineEntry(
+                    owner_id=follower_id,
+                    post_id=post_id,
+                    created_at=created_at,
+                )
+                for follower_id in follower_ids
+                for post_id, created_at in posts
+            ),
+            batch_size,
+        )
+
+    return created
+
+
+def prune(owner_id, author_id):
+    """Drop the posts of an unfollowed author from a timeline"""
+    deleted, _ = TimelineEntry.objects.filter(
+        owner_id=owner_id, post__created_by_id=author_id
+    ).delete()
+
+    return deleted
+
+
+def _before(position, created_at_field, id_field):
+    created_at, pk = position
+
+    return Q(**{f"{created_at_field}__lt": created_at}) | Q(
+        **{created_at_field: created_at, f"{id_field}__lt": pk}
+    )
+
+
+def get_feed_page(user_id, position=None, page_size=10):
+    """
+    Return post ids of one feed page ordered by (created_at, id) descending
+    and the position the next page starts after, if there is one.
+
+    Fanned out timeline entries are merged with the latest posts of followed
+    authors that are read on demand, so a page never costs more than two
+    index range scans of page_size + 1 rows.
+    """
+    sources = []
+
+    entries = TimelineEntry.objects.filter(owner_id=user_id)
+    if position:
+        entries = entries.filter(_before(position, "created_at", "post_id"))
+    sources.append(
+        entries.order_by("-created_at", "-post_id").values_list(
+            "created_at", "post_id"
+        )[: page_size + 1]
+    )
+
+    author_ids = get_fan_out_on_read_ids(user_id)
+    if author_ids:
+        posts = Post.objects.filter(
+            created_by_id__in=author_ids, is_visible=True
+        )
+        if position:
+            posts = posts.filter(_before(position, "created_at", "id"))
+        sources.append(
+            posts.order_by("-created_at", "-id").values_list(
+                "created_at", "id"
+            )[: page_size + 1]
+        )
+
+    page = []
+    seen = set()
+
+    for created_at, post_id in heapq.merge(*sources, reverse=True):
+        if post_id in seen:
+            continue
+
+        seen.add(post_id)
+        page.append((created_at, post_id))
+
+        if len(page) > page_size:
+            break
+
+    next_position = page[page_size - 1] if len(page) > page_size else None
+
+    return [post_id for _, post_id in page[:page_size]], next_position
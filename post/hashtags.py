@@ -0,0 +1,114 @@
+import logging
+import re
+import time
+
+from django.conf import settings
+from redis import RedisError
+
+from api.redis_client import get_redis
+from post.models import HashTag, Post, normalize_hashtag
+
+logger = logging.getLogger(__name__)
+
+# A hashtag is a word with at least one letter, after a non-word character
+HASHTAG_PATTERN = re.compile(r"(?<![\w&#])#(\w*[^\W\d_]\w*)")
+TRENDING_KEY_PREFIX = "hashtags:trending"
+
+
+def parse(text):
+    """Return the normalized unique hashtags of a text in order"""
+    names = {}
+
+    for match in HASHTAG_PATTERN.finditer(text or ""):
+        name = normalize_hashtag(match.group(1))
+
+        if len(name) <= HashTag._meta.get_field("name").max_length:
+            names.setdefault(name, None)
+
+    return list(names)
+
+
+def attach(post, names):
+    """Create missing hashtags and add them to a post in bulk"""
+    if not names:
+        return []
+
+    HashTag.objects.bulk_create(
+        [HashTag(name=name) for name in names], ignore_conflicts=True
+    )
+    hashtags = dict(
+        HashTag.objects.filter(name__in=names).values_list("id", "name")
+    )
+    attached_ids = set(
+        post.hashtags.filter(id__in=hashtags).values_list("id", flat=True)
+    )
+    new_ids = [
+        hashtag_id for hashtag_id in hashtags if hashtag_id not in attached_ids
+    ]
+
+    Post.hashtags.through.objects.bulk_create(
+        [
+            Post.hashtags.through(post_id=post.id, hashtag_id=hashtag_id)
+            for hashtag_id in new_ids
+        ],
+        ignore_conflicts=True,
+    )
+
+    return [hashtags[hashtag_id] for hashtag_id in new_ids]
+
+
+def get_bucket(timestamp=None):
+    timestamp = time.time() if timestamp is None else timestamp
+    return int(timestamp // settings.HASHTAG_TRENDING_BUCKET_SECONDS)
+
+
+def get_bucket_key(bucket):
+    return f"{TRENDING_KEY_PREFIX}:{bucket}"
+
+
+def record_usage(names):
+    """Count hashtag usage in the sorted set of the current time bucket"""
+    if not names:
+        return
+
+    key = get_bucket_key(get_bucket())
+    ttl = settings.HASHTAG_TRENDING_BUCKET_SECONDS * (
+        settings.HASHTAG_TRENDING_BUCKETS + 1
+    )
+
+    try:
+        pipeline = get_redis().pipeline()
+        for name in names:
+            pipeline.zincrby(key, 1, name)
+        pipeline.expire(key, ttl)
+        pipeline.execute()
+    except RedisError:
+        logger.warning("Hashtag usage not recorded", exc_info=True)
+
+
+def get_trending(limit=10):
+    """
+    Return (name, score) of the top hashtags, summing the recent time
+    buckets with exponentially decaying weights
+    """
+    current = get_bucket()
+    weights = {
+        get_bucket_key(current - age): settings.HASHTAG_TRENDING_DECAY**age
+        for age in range(settings.HASHTAG_TRENDING_BUCKETS)
+    }
+    # The union changes only as fast as the current bucket fills
+    union_key = f"{TRENDING_KEY_PREFIX}:union:{current}"
+
+    try:
+        client = get_redis()
+
+        if not client.exists(union_key):
+            pipeline = client.pipeline()
+            pipeline.zunionstore(union_key, weights)
+            pipeline.expire(union_key, settings.HASHTAG_TRENDING_CACHE_SECONDS)
+            pipeline.execute()
+
+        return client.zrevrange(union_key, 0, limit - 1, withscores=True)
+    except RedisError:
+        logger.warning("Trending hashtags not available", exc_info=True)
+        return []
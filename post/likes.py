@@ -0,0 +1,394 @@
+"""
+Write-behind buffer of likes in Redis. Likes and unlikes are kept in
+per-post sets until a periodic task flushes them into the Like table,
+so that spikes on hot posts do not contend on their rows. Both the
+flush and the batch endpoint move the counters by the rows they
+actually inserted and deleted. A flush moves
+the sets it writes aside in one transaction, likes arriving meanwhile
+are buffered in new sets.
+"""
+
+import logging
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, F, Q, Value, When
+from django.db.models.functions import Now
+from django.utils import timezone
+from redis import RedisError
+
+from api.cache import bump_objects
+from api.redis_client import get_redis
+from post.models import Like, Post
+from user.models import User
+
+logger = logging.getLogger(__name__)
+
+DIRTY_KEY = "likes:buffer:dirty"
+# Posts whose likes a flush took, until they are written
+FLUSHING_KEY = "likes:buffer:flushing"
+FLUSH_LOCK_KEY = "likes:buffer:flush"
+# Longer than a flush takes, so that flushes never overlap
+FLUSH_LOCK_SECONDS = 300
+
+
+def is_enabled():
+    return settings.LIKE_WRITE_BEHIND
+
+
+def get_post_keys(post_id):
+    """Keys of the users who liked and unliked the post"""
+    return (
+        f"likes:buffer:post:{post_id}:added",
+        f"likes:buffer:post:{post_id}:removed",
+    )
+
+
+def get_user_keys(user_id):
+    """Keys of the posts the user liked and unliked"""
+    return (
+        f"likes:buffer:user:{user_id}:added",
+        f"likes:buffer:user:{user_id}:removed",
+    )
+
+
+def get_flushing_keys(post_id):
+    """Keys the sets of the post are moved to while a flush writes them"""
+    return tuple(f"{key}:flushing" for key in get_post_keys(post_id))
+
+
+def to_ids(members):
+    return {int(member) for member in members}
+
+
+def insert(pairs, batch_size=500):
+    """
+    Insert (post_id, user_id) likes, skipping those that exist, and
+    return the post ids of the rows inserted
+    """
+    pairs = list(pairs)
+    quote = connection.ops.quote_name
+    columns = ", ".join(
+        quote(column)
+        for column in ("post_id", "created_by_id", "created_at", "updated_at")
+    )
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    inserted = []
+
+    # RETURNING, supported by PostgreSQL and SQLite 3.35+, tells which
+    # rows a conflict skipped, so that counters never count them twice
+    with connection.cursor() as cursor:
+        for start in range(0, len(pairs), batch_size):
+            batch = pairs[start : start + batch_size]
+            cursor.execute(
+                f"INSERT INTO {quote(Like._meta.db_table)} ({columns}) "
+                f"VALUES {', '.join(['(%s, %s, %s, %s)'] * len(batch))} "
+                f"ON CONFLICT DO NOTHING RETURNING post_id",
+                [
+                    value
+                    for post_id, user_id in batch
+                    for value in (post_id, user_id, now, now)
+                ],
+            )
+            inserted += [post_id for post_id, in cursor.fetchall()]
+
+    return inserted
+
+
+def delete(condition):
+    """
+    Delete the likes matching condition and return the post ids of the
+    rows deleted. Rows are locked first, so a concurrent delete of the
+    same like waits and then deletes nothing.
+    """
+    rows = list(
+        Like.objects.select_for_update()
+        .filter(condition)
+        .values_list("id", "post_id")
+    )
+    Like.objects.filter(pk__in=[like_id for like_id, _ in rows]).delete()
+
+    return [post_id for _, post_id in rows]
+
+
+def apply_counts(inserted_ids, deleted_ids):
+    """
+    Move the likes counters by the inserted and deleted likes, given as
+    post ids, in one UPDATE and return the ids of the posts changed
+    """
+    counts = Counter(inserted_ids)
+    counts.subtract(deleted_ids)
+    counts = {post_id: count for post_id, count in counts.items() if count}
+
+    if counts:
+        Post.objects.filter(pk__in=counts).update(
+            likes_count=F("likes_count")
+            + Case(
+                *(
+                    When(pk=post_id, then=Value(count))
+                    for post_id, count in counts.items()
+                ),
+                default=Value(0),
+            ),
+            updated_at=Now(),
+        )
+
+    return list(counts)
+
+
+def buffer(user_id, like_ids=(), unlike_ids=()):
+    """
+    Record likes and unlikes of a user. Added sets only hold likes
+    without a row and removed sets only likes with one, so that their
+    sizes are the exact pending change of the post counters. Likes being
+    flushed count as written, as their rows may not be committed yet.
+    """
+    post_ids = sorted(set(like_ids) | set(unlike_ids))
+
+    if not post_ids:
+        return
+
+    redis = get_redis()
+    pipeline = redis.pipeline()
+
+    # Read before the table, a flush drops its sets after its commit
+    for post_id in post_ids:
+        for key in get_flushing_keys(post_id):
+            pipeline.sismember(key, user_id)
+
+    flushing = pipeline.execute()
+    liked_ids = set(
+        Like.objects.filter(
+            created_by_id=user_id, post_id__in=post_ids
+        ).values_list("post_id", flat=True)
+    )
+
+    for i, post_id in enumerate(post_ids):
+        if flushing[2 * i]:
+            liked_ids.add(post_id)
+        elif flushing[2 * i + 1]:
+            liked_ids.discard(post_id)
+
+    user_added_key, user_removed_key = get_user_keys(user_id)
+    pipeline = redis.pipeline()
+
+    for post_id in like_ids:
+        added_key, removed_key = get_post_keys(post_id)
+        pipeline.srem(removed_key, user_id)
+        pipeline.srem(user_removed_key, post_id)
+
+        if post_id not in liked_ids:
+            pipeline.sadd(added_key, user_id)
+            pipeline.sadd(user_added_key, post_id)
+
+    for post_id in unlike_ids:
+        added_key, removed_key = get_post_keys(post_id)
+        pipeline.srem(added_key, user_id)
+        pipeline.srem(user_added_key, post_id)
+
+        if post_id in liked_ids:
+            pipeline.sadd(removed_key, user_id)
+            pipeline.sadd(user_removed_key, post_id)
+
+    pipeline.sadd(DIRTY_KEY, *post_ids)
+    pipeline.execute()
+
+
+def get_pending_counts(post_ids):
+    """Return {post_id: pending change of its likes counter}"""
+    post_ids = list(post_ids)
+
+    if not is_enabled() or not post_ids:
+        return {}
+
+    pipeline = get_redis().pipeline()
+
+    for post_id in post_ids:
+        for key in get_post_keys(post_id) + get_flushing_keys(post_id):
+            pipeline.scard(key)
+
+    try:
+        sizes = pipeline.execute()
+    except RedisError:
+        logger.warning("Buffered likes not available", exc_info=True)
+        return {}
+
+    counts = {}
+
+    for i, post_id in enumerate(post_ids):
+        added, removed, flushing_added, flushing_removed = sizes[
+            4 * i : 4 * i + 4
+        ]
+        # Counted twice between the commit of a flush and its cleanup
+        count = added + flushing_added - removed - flushing_removed
+
+        if count:
+            counts[post_id] = count
+
+    return counts
+
+
+def get_pending_preview(post_id, user_ids, size):
+    """
+    Return up to size users with a pending like of the post, and those
+    of user_ids whose like is pending removal
+    """
+    if not is_enabled():
+        return set(), set()
+
+    added_key, removed_key = get_post_keys(post_id)
+    flushing_added_key, flushing_removed_key = get_flushing_keys(post_id)
+    user_ids = list(user_ids)
+    pipeline = get_redis().pipeline()
+    pipeline.srandmember(added_key, size)
+    pipeline.srandmember(flushing_added_key, size)
+
+    for user_id in user_ids:
+        pipeline.sismember(removed_key, user_id)
+        pipeline.sismember(flushing_removed_key, user_id)
+
+    try:
+        added, flushing_added, *removed = pipeline.execute()
+    except RedisError:
+        logger.warning("Buffered likes not available", exc_info=True)
+        return set(), set()
+
+    added_ids = sorted(to_ids(added) | to_ids(flushing_added))[:size]
+    removed_ids = {
+        user_id
+        for i, user_id in enumerate(user_ids)
+        if removed[2 * i] or removed[2 * i + 1]
+    }
+
+    return set(added_ids), removed_ids
+
+
+def get_user_pending(user_id):
+    """Return the (added post ids, removed post ids) of a user"""
+    if not is_enabled():
+        return set(), set()
+
+    pipeline = get_redis().pipeline()
+
+    for key in get_user_keys(user_id):
+        pipeline.smembers(key)
+
+    try:
+        added, removed = pipeline.execute()
+    except RedisError:
+        logger.warning("Buffered likes not available", exc_info=True)
+        return set(), set()
+
+    return to_ids(added), to_ids(removed)
+
+
+def take_pending(batch_size):
+    """
+    Move the buffered likes of up to batch_size dirty posts into their
+    flushing sets in one transaction and return the likes to write, with
+    those left by a failed flush. Likes buffered meanwhile go to new sets.
+    """
+    redis = get_redis()
+    post_ids = to_ids(redis.srandmember(DIRTY_KEY, batch_size))
+    post_ids = sorted(post_ids | to_ids(redis.smembers(FLUSHING_KEY)))
+
+    if not post_ids:
+        return {}
+
+    pipeline = redis.pipeline(transaction=True)
+
+    for post_id in post_ids:
+        for key, flushing_key in zip(
+            get_post_keys(post_id), get_flushing_keys(post_id)
+        ):
+            pipeline.sunionstore(flushing_key, [flushing_key, key])
+            pipeline.delete(key)
+
+    pipeline.srem(DIRTY_KEY, *post_ids)
+    pipeline.sadd(FLUSHING_KEY, *post_ids)
+    pipeline.execute()
+
+    pipeline = redis.pipeline()
+
+    for post_id in post_ids:
+        for key in get_flushing_keys(post_id):
+            pipeline.smembers(key)
+
+    members = pipeline.execute()
+
+    return {
+        post_id: (to_ids(members[2 * i]), to_ids(members[2 * i + 1]))
+        for i, post_id in enumerate(post_ids)
+    }
+
+
+def clear_pending(pending):
+    """Drop the written likes from the flushing sets and the user sets"""
+    pipeline = get_redis().pipeline(transaction=True)
+
+    for post_id, user_ids in pending.items():
+        for index, ids in enumerate(user_ids):
+            for user_id in ids:
+                pipeline.srem(get_user_keys(user_id)[index], post_id)
+
+        pipeline.delete(*get_flushing_keys(post_id))
+
+    pipeline.srem(FLUSHING_KEY, *pending)
+    pipeline.execute()
+
+
+def write_pending(pending):
+    """
+    Write taken likes and move the post counters by the rows actually
+    inserted and deleted, which skips likes a synchronous write already
+    made and unlikes whose row is gone
+    """
+    removed = Q(pk__in=[])
+
+    for post_id, (_, removed_ids) in pending.items():
+        if removed_ids:
+            removed |= Q(post_id=post_id, created_by_id__in=removed_ids)
+
+    with transaction.atomic():
+        existing_ids = set(
+            Post.objects.filter(pk__in=pending).values_list("id", flat=True)
+        )
+        user_ids = set(
+            User.objects.filter(
+                pk__in=set().union(*(ids for ids, _ in pending.values()))
+            ).values_list("id", flat=True)
+        )
+        # Likes of posts and users deleted in the meantime are dropped
+        inserted_ids = insert(
+            (post_id, user_id)
+            for post_id, (added_ids, _) in pending.items()
+            if post_id in existing_ids
+            for user_id in added_ids & user_ids
+        )
+        deleted_ids = delete(removed)
+        changed_ids = apply_counts(inserted_ids, deleted_ids)
+
+    transaction.on_commit(lambda: bump_objects("post", changed_ids))
+
+
+def flush(batch_size=1000):
+    """
+    Write buffered likes of up to batch_size posts, return their count.
+    A failed flush leaves its flushing sets to be retried by the next one.
+    """
+    redis = get_redis()
+
+    if not redis.set(FLUSH_LOCK_KEY, 1, nx=True, ex=FLUSH_LOCK_SECONDS):
+        return 0
+
+    try:
+        pending = take_pending(batch_size)
+
+        if pending:
+            write_pending(pending)
+            clear_pending(pending)
+    finally:
+        redis.delete(FLUSH_LOCK_KEY)
+
+    return len(pending)
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("post", "0004_timelineentry"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["created_at", "id"], name="comment_created_at_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                fields=["created_at", "id"], name="post_created_at_id_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:28
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_rows(model):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(post=OuterRef("pk"))
+            .order_by()
+            .values("post")
+            .annotate(count=Count("pk"))
+            .values("count")
+        ),
+        0,
+    )
+
+
+def fill_counters(apps, schema_editor):
+    Post = apps.get_model("post", "Post")
+    Like = apps.get_model("post", "Like")
+    Comment = apps.get_model("post", "Comment")
+
+    Post.objects.update(
+        likes_count=count_rows(Like), comments_count=count_rows(Comment)
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("post", "0005_post_comment_created_at_id_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="comments_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="likes_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:50
+
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db import migrations, models
+from django.db.models.functions import Upper
+
+from api.operations import PostgresAddIndex
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("post", "0006_post_likes_count_and_comments_count"),
+        ("user", "0003_user_trigram_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="like",
+            index=models.Index(
+                fields=["created_by", "post"], name="like_created_by_post_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                fields=["is_visible", "created_at"],
+                name="post_visible_created_at_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                fields=["profile", "created_at"],
+                name="post_profile_created_at_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                condition=models.Q(("is_visible", False)),
+                fields=["created_by", "created_at"],
+                name="post_hidden_created_by_idx",
+            ),
+        ),
+        PostgresAddIndex(
+            model_name="post",
+            index=GinIndex(
+                OpClass(Upper("title"), name="gin_trgm_ops"),
+                name="post_title_trgm_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:04
+
+import django.contrib.postgres.search
+from django.contrib.postgres.indexes import GinIndex
+from django.db import migrations
+
+from api.operations import PostgresAddIndex
+
+
+def create_sqlite_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE post_search USING fts5("
+            "title, content, hashtags, "
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        )
+
+
+def drop_sqlite_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute("DROP TABLE post_search")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("post", "0007_post_like_filter_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        PostgresAddIndex(
+            model_name="post",
+            index=GinIndex(
+                fields=["search_vector"], name="post_search_vector_idx"
+            ),
+        ),
+        migrations.RunPython(
+            create_sqlite_search_table, drop_sqlite_search_table
+        ),
+    ]
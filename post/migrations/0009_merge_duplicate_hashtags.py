@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:05
+
+from django.db import migrations
+
+
+def merge_duplicate_hashtags(apps, schema_editor):
+    """Casefold hashtag names and merge the ones that become equal"""
+    HashTag = apps.get_model("post", "HashTag")
+    PostHashTag = apps.get_model("post", "Post").hashtags.through
+    kept_ids = {}
+
+    for hashtag_id, original_name in list(
+        HashTag.objects.order_by("id").values_list("id", "name")
+    ):
+        name = original_name.strip().lstrip("#").casefold()
+        kept_id = kept_ids.setdefault(name, hashtag_id)
+
+        if kept_id != hashtag_id:
+            PostHashTag.objects.filter(hashtag_id=hashtag_id).exclude(
+                post_id__in=PostHashTag.objects.filter(
+                    hashtag_id=kept_id
+                ).values("post_id")
+            ).update(hashtag_id=kept_id)
+            HashTag.objects.filter(pk=hashtag_id).delete()
+        elif original_name != name:
+            HashTag.objects.filter(pk=hashtag_id).update(name=name)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("post", "0008_post_search_vector"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_hashtags, migrations.RunPython.noop
+        ),
+    ]
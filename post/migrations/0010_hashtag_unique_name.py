@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("post", "0009_merge_duplicate_hashtags"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="hashtag",
+            name="name",
+            field=models.CharField(max_length=255, unique=True),
+        ),
+    ]
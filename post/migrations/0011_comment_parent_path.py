@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:20
+
+from django.db import migrations, models
+from django.db.models import CharField, Value
+from django.db.models.functions import Cast, LPad
+import django.db.models.deletion
+
+
+def fill_paths(apps, schema_editor):
+    """Existing comments are all roots of their own threads"""
+    Comment = apps.get_model("post", "Comment")
+
+    Comment.objects.update(
+        path=LPad(Cast("id", output_field=CharField()), 10, Value("0"))
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("post", "0010_hashtag_unique_name"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="comment",
+            name="parent",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="replies",
+                to="post.comment",
+            ),
+        ),
+        migrations.AddField(
+            model_name="comment",
+            name="path",
+            field=models.CharField(default="", editable=False, max_length=255),
+        ),
+        migrations.RunPython(fill_paths, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["post", "path"], name="comment_post_path_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("post", "0011_comment_parent_path"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="like",
+            index=models.Index(
+                fields=["post", "created_at"], name="like_post_created_at_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("post", "0012_like_post_created_at_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                condition=models.Q(
+                    ("is_visible", False), ("scheduled_time__isnull", False)
+                ),
+                fields=["scheduled_time"],
+                name="post_scheduled_time_idx",
+            ),
+        ),
+    ]
@@ -1,5 +1,7 @@
 import os
 import uuid
+from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.utils.text import slugify
 
@@ -15,8 +17,16 @@ def get_image_file_path(instance, filename):
     return os.path.join("uploads", dirname, filename)
 
 
+def normalize_hashtag(name):
+    return name.strip().lstrip("#").casefold()
+
+
 class HashTag(models.Model):
-    name = models.CharField(max_length=255)
+    name = models.CharField(max_length=255, unique=True)
+
+    def save(self, *args, **kwargs):
+        self.name = normalize_hashtag(self.name)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.id}: {self.name}"
@@ -38,6 +48,50 @@ class Post(CoreModel):
     )
     is_visible = models.BooleanField(default=True)
     scheduled_time = models.DateTimeField(blank=True, null=True)
+    likes_count = models.PositiveIntegerField(default=0, editable=False)
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
+    # Title, content and hashtag names, maintained by post.search
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["created_at", "id"], name="post_created_at_id_idx"
+            ),
+            models.Index(
+                fields=["is_visible", "created_at"],
+                name="post_visible_created_at_idx",
+            ),
+            models.Index(
+                fields=["profile", "created_at"],
+                name="post_profile_created_at_idx",
+            ),
+            # Hidden posts are only read by their authors
+            models.Index(
+                fields=["created_by", "created_at"],
+                condition=models.Q(is_visible=False),
+                name="post_hidden_created_by_idx",
+            ),
+            # Swept for scheduled posts due to be published
+            models.Index(
+                fields=["scheduled_time"],
+                condition=models.Q(
+                    is_visible=False, scheduled_time__isnull=False
+                ),
+                name="post_scheduled_time_idx",
+            ),
+        ]
+
+    @staticmethod
+    def get_visibility_filter(user):
+        """Filter of visible posts and hidden posts of the user"""
+        visible = models.Q(is_visible=True)
+
+        if user.is_authenticated:
+            # Spelled out for the partial index on hidden posts
+            visible |= models.Q(is_visible=False, created_by=user)
+
+        return visible
 
     def __str__(self):
         return f"{self.id}: {self.title}"
@@ -54,16 +108,103 @@ class Like(CoreModel):
                 fields=["post_id", "created_by_id"], name="unique_likes"
             )
         ]
+        indexes = [
+            models.Index(
+                fields=["created_by", "post"], name="like_created_by_post_idx"
+            ),
+            models.Index(
+                fields=["post", "created_at"], name="like_post_created_at_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"Liked by {self.created_by}"
 
 
 class Comment(CoreModel):
+    """
+    Comment or reply in a thread. The path holds the ids of the root
+    comment down to this one, each zero padded to PATH_STEP digits, so
+    that a whole thread is one range over the (post, path) index.
+    """
+
+    PATH_STEP = 10
+    # Sorts after every digit, so no path of a reply reaches it
+    PATH_END = "z"
+
     post = models.ForeignKey(
         Post, on_delete=models.CASCADE, related_name="comments"
     )
+    parent = models.ForeignKey(
+        "self",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="replies",
+    )
+    path = models.CharField(max_length=255, editable=False, default="")
     content = models.TextField()
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["created_at", "id"], name="comment_created_at_id_idx"
+            ),
+            models.Index(
+                fields=["post", "path"], name="comment_post_path_idx"
+            ),
+        ]
+
+    @property
+    def depth(self):
+        return len(self.path) // self.PATH_STEP - 1
+
+    def get_thread_filter(self, include_self=True):
+        """Filter of the comment and all replies below it"""
+        return models.Q(
+            post_id=self.post_id,
+            path__lt=self.path + self.PATH_END,
+            **{"path__gte" if include_self else "path__gt": self.path},
+        )
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+
+        # The path ends with the id, known only once the row is inserted
+        if not self.path:
+            parent_path = self.parent.path if self.parent_id else ""
+            self.path = f"{parent_path}{self.pk:0{self.PATH_STEP}d}"
+            Comment.objects.filter(pk=self.pk).update(path=self.path)
+
     def __str__(self):
         return f"{self.id}: {self.content} (by {self.created_by})"
+
+
+class TimelineEntry(models.Model):
+    """Post fanned out into the home timeline of a follower of its author"""
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="timeline_entries",
+    )
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE, related_name="timeline_entries"
+    )
+    created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["owner", "post"], name="unique_timeline_entries"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["owner", "-created_at", "-post"],
+                name="timeline_owner_created_idx",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.post_id} in timeline of {self.owner_id}"
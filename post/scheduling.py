@@ -0,0 +1,66 @@
+from django.db import connection, transaction
+from django.utils import timezone
+
+from post import hashtags
+from post.models import Post
+
+
+def publish(post_ids):
+    """
+    Make the hidden posts among post_ids visible with one conditional
+    UPDATE and return the ids of those it published. Posts that are
+    deleted or already visible are skipped, so publishing is idempotent.
+    Their schedule is cleared, so that hiding them later is final.
+    """
+    post_ids = list(post_ids)
+
+    if not post_ids:
+        return []
+
+    post_table = Post._meta.db_table
+    placeholders = ", ".join(["%s"] * len(post_ids))
+    updated_at = connection.ops.adapt_datetimefield_value(timezone.now())
+
+    # RETURNING, supported by PostgreSQL and SQLite 3.35+, saves reading
+    # the published ids back in a second query
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {post_table} SET is_visible = %s, updated_at = %s, "
+            f"scheduled_time = NULL "
+            f"WHERE id IN ({placeholders}) AND NOT is_visible "
+            f"RETURNING id",
+            [True, updated_at, *post_ids],
+        )
+        published_ids = [post_id for post_id, in cursor.fetchall()]
+
+    if published_ids:
+        names = list(
+            Post.hashtags.through.objects.filter(
+                post_id__in=published_ids
+            ).values_list("hashtag__name", flat=True)
+        )
+        transaction.on_commit(lambda: hashtags.record_usage(names))
+
+    return published_ids
+
+
+def publish_due(batch_size=1000):
+    """
+    Publish up to batch_size scheduled posts due by now, return their
+    ids and how many seconds after their scheduled time they were
+    published. Rows locked by a concurrent sweep are skipped.
+    """
+    now = timezone.now()
+
+    with transaction.atomic():
+        due = dict(
+            Post.objects.select_for_update(skip_locked=True)
+            .filter(is_visible=False, scheduled_time__lte=now)
+            .order_by("scheduled_time")
+            .values_list("id", "scheduled_time")[:batch_size]
+        )
+        post_ids = publish(due)
+
+    lags = [(now - due[post_id]).total_seconds() for post_id in post_ids]
+
+    return post_ids, lags
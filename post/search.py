@@ -0,0 +1,108 @@
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+)
+from django.db import connection
+from django.db.models import F, OuterRef, Subquery, TextField, Value
+from django.db.models.functions import Coalesce
+
+from post.models import HashTag, Post
+
+# FTS5 table mirroring the searchable text of posts on SQLite, rowid is
+# the post id
+SQLITE_SEARCH_TABLE = "post_search"
+
+
+def is_postgresql():
+    return connection.vendor == "postgresql"
+
+
+def update_index(post_ids):
+    """Recompute the searchable title, content and hashtags of posts"""
+    post_ids = list(post_ids)
+
+    if not post_ids:
+        return
+
+    if is_postgresql():
+        hashtag_names = Subquery(
+            HashTag.objects.filter(posts=OuterRef("pk"))
+            .values("posts")
+            .annotate(names=StringAgg("name", " "))
+            .values("names")
+        )
+        Post.objects.filter(pk__in=post_ids).update(
+            search_vector=(
+                SearchVector("title", weight="A")
+                + SearchVector(
+                    Coalesce(
+                        hashtag_names, Value(""), output_field=TextField()
+                    ),
+                    weight="A",
+                )
+                + SearchVector("content", weight="B")
+            )
+        )
+        return
+
+    post_table = Post._meta.db_table
+    hashtag_table = HashTag._meta.db_table
+    through_table = Post.hashtags.through._meta.db_table
+    placeholders = ", ".join(["%s"] * len(post_ids))
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {SQLITE_SEARCH_TABLE} "
+            f"WHERE rowid IN ({placeholders})",
+            post_ids,
+        )
+        cursor.execute(
+            f"INSERT INTO {SQLITE_SEARCH_TABLE} "
+            f"(rowid, title, content, hashtags) "
+            f"SELECT p.id, COALESCE(p.title, ''), p.content, COALESCE(("
+            f"SELECT group_concat(h.name, ' ') FROM {hashtag_table} h "
+            f"JOIN {through_table} ph ON ph.hashtag_id = h.id "
+            f"WHERE ph.post_id = p.id), '') "
+            f"FROM {post_table} p WHERE p.id IN ({placeholders})",
+            post_ids,
+        )
+
+
+def clear_index():
+    """Drop index rows of deleted posts before a full rebuild"""
+    if not is_postgresql():
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SQLITE_SEARCH_TABLE}")
+
+
+def search(queryset, query):
+    """Filter posts matching the query, annotated with search_rank"""
+    if is_postgresql():
+        search_query = SearchQuery(query, search_type="websearch")
+        return queryset.filter(search_vector=search_query).annotate(
+            search_rank=SearchRank(F("search_vector"), search_query)
+        )
+
+    # Quote every term, so that user input is never parsed as FTS5 syntax
+    match = " ".join(
+        '"{}"'.format(term.replace('"', '""')) for term in query.split()
+    )
+
+    if not match:
+        return queryset.none()
+
+    post_table = Post._meta.db_table
+
+    # Joined rather than filtered with a subquery, so that FTS5 runs the
+    # match once and its bm25 rank, lower for better matches, is at hand
+    return queryset.extra(
+        tables=[SQLITE_SEARCH_TABLE],
+        where=[
+            f"{SQLITE_SEARCH_TABLE} MATCH %s",
+            f"{SQLITE_SEARCH_TABLE}.rowid = {post_table}.id",
+        ],
+        params=[match],
+        select={"search_rank": f"-{SQLITE_SEARCH_TABLE}.rank"},
+    )
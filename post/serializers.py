@@ -1,37 +1,129 @@
+from django.conf import settings
+from django.db import transaction
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
 
-from post.models import HashTag, Like, Comment, Post
+from post import hashtags
+from post.models import HashTag, Like, Comment, Post, normalize_hashtag
 from user.serializers import CoreModelSerializer
 
 
+class HashTagNameField(serializers.CharField):
+    def to_internal_value(self, data):
+        name = normalize_hashtag(super().to_internal_value(data))
+
+        if not hashtags.HASHTAG_PATTERN.fullmatch(f"#{name}"):
+            raise serializers.ValidationError(
+                "Hashtag must be a word with at least one letter."
+            )
+
+        return name
+
+
 class HashTagSerializer(serializers.ModelSerializer):
+    name = HashTagNameField(
+        max_length=255,
+        validators=[UniqueValidator(queryset=HashTag.objects.all())],
+    )
+
     class Meta:
         model = HashTag
         fields = ("id", "name")
 
 
+class TrendingHashTagSerializer(serializers.Serializer):
+    name = serializers.CharField()
+    score = serializers.FloatField()
+
+
 class LikeSerializer(CoreModelSerializer, serializers.ModelSerializer):
     class Meta:
         model = Like
         fields = ("id", "post", "created_by")
 
 
+class LikeBatchSerializer(serializers.Serializer):
+    like = serializers.ListField(
+        child=serializers.IntegerField(), max_length=1000, default=list
+    )
+    unlike = serializers.ListField(
+        child=serializers.IntegerField(), max_length=1000, default=list
+    )
+
+    def validate(self, attrs):
+        if set(attrs["like"]) & set(attrs["unlike"]):
+            raise serializers.ValidationError(
+                "A post cannot be liked and unliked at once."
+            )
+
+        return attrs
+
+
 class CommentSerializer(CoreModelSerializer, serializers.ModelSerializer):
     created_by = serializers.StringRelatedField()
+    depth = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Comment
-        fields = ("id", "post", "content") + CoreModelSerializer.Meta.fields
+        fields = (
+            "id",
+            "post",
+            "parent",
+            "depth",
+            "content",
+        ) + CoreModelSerializer.Meta.fields
+
+    def validate(self, attrs):
+        instance = self.instance
+        post = attrs.get("post", instance and instance.post)
+        parent = attrs.get("parent", instance and instance.parent)
+
+        if instance and parent != instance.parent:
+            raise serializers.ValidationError(
+                {"parent": "Replies cannot be moved to another comment."}
+            )
+
+        if (
+            instance
+            and post != instance.post
+            and (instance.parent_id or instance.replies.exists())
+        ):
+            raise serializers.ValidationError(
+                {"post": "Threads cannot be moved to another post."}
+            )
+
+        if parent:
+            if parent.post_id != post.id:
+                raise serializers.ValidationError(
+                    {"parent": "Replies must belong to the post."}
+                )
+
+            max_length = Comment._meta.get_field("path").max_length
+            if len(parent.path) + Comment.PATH_STEP > max_length:
+                raise serializers.ValidationError(
+                    {"parent": "The thread is too deep to reply."}
+                )
+
+        return attrs
 
 
 class CommentDetailSerializer(
     CoreModelSerializer, serializers.ModelSerializer
 ):
     post = serializers.StringRelatedField(many=False, read_only=True)
+    depth = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Comment
-        fields = ("id", "content", "post") + CoreModelSerializer.Meta.fields
+        fields = (
+            "id",
+            "content",
+            "post",
+            "parent",
+            "depth",
+        ) + CoreModelSerializer.Meta.fields
+        read_only_fields = ("parent",)
 
 
 class PostImageSerializer(serializers.ModelSerializer):
@@ -56,9 +148,42 @@ class PostSerializer(CoreModelSerializer, serializers.ModelSerializer):
 
         read_only_fields = ("profile",)
 
+    def attach_hashtags(self, post):
+        """Add the hashtags written in the content to the post"""
+        names = hashtags.attach(post, hashtags.parse(post.content))
+
+        if names and post.is_visible:
+            transaction.on_commit(lambda: hashtags.record_usage(names))
+
+    def create(self, validated_data):
+        post = super().create(validated_data)
+        self.attach_hashtags(post)
+
+        return post
+
+    def update(self, instance, validated_data):
+        if validated_data.get("is_visible"):
+            # Published by hand, the sweep must not publish it again
+            validated_data["scheduled_time"] = None
+
+        post = super().update(instance, validated_data)
+        self.attach_hashtags(post)
+
+        return post
+
+    def get_pending_likes(self, post):
+        """Return the (added, removed) user ids of likes not yet written"""
+        return self.context.get("pending_likes", {}).get(
+            post.id, (set(), set())
+        )
+
+    def get_pending_likes_count(self, post):
+        """Return the change of likes_count not yet written"""
+        return self.context.get("pending_likes_counts", {}).get(post.id, 0)
+
 
 class PostListSerializer(PostSerializer):
-    likes_count = serializers.IntegerField(read_only=True)
+    likes_count = serializers.SerializerMethodField()
     comments_count = serializers.IntegerField(read_only=True)
 
     class Meta:
@@ -68,17 +193,43 @@ class PostListSerializer(PostSerializer):
             "comments_count",
         )
 
+    @extend_schema_field(serializers.IntegerField())
+    def get_likes_count(self, post):
+        return post.likes_count + self.get_pending_likes_count(post)
 
-class PostDetailSerializer(PostSerializer):
-    likes = serializers.SlugRelatedField(
-        many=True, read_only=True, slug_field="created_by_id"
-    )
-    comments = serializers.StringRelatedField(many=True, read_only=True)
+
+class PostDetailSerializer(PostListSerializer):
+    """
+    Post with the previews of its latest likes and first comments
+    prefetched by the view, all of them are paged through
+    /posts/{id}/likes/ and /posts/{id}/comments/
+    """
+
+    likes = serializers.SerializerMethodField()
+    comments = serializers.SerializerMethodField()
     hashtags = serializers.StringRelatedField(many=True, read_only=True)
 
     class Meta:
         model = Post
-        fields = PostSerializer.Meta.fields + (
+        fields = PostListSerializer.Meta.fields + (
             "likes",
             "comments",
         )
+
+    @extend_schema_field(
+        serializers.ListField(child=serializers.IntegerField())
+    )
+    def get_likes(self, post):
+        """Ids of the users who liked the post last"""
+        added_ids, removed_ids = self.get_pending_likes(post)
+        liked_ids = sorted(added_ids) + [
+            like.created_by_id
+            for like in post.preview_likes
+            if like.created_by_id not in removed_ids
+        ]
+
+        return liked_ids[: settings.NESTED_PREVIEW_SIZE]
+
+    @extend_schema_field(serializers.ListField(child=serializers.CharField()))
+    def get_comments(self, post):
+        return [str(comment) for comment in post.preview_comments]
@@ -1,15 +1,101 @@
 from celery import shared_task
 from celery.utils.log import get_task_logger
+from django.db import DatabaseError
 
-from post.models import Post
+from api.cache import bump_version
+from post import feed, likes, scheduling, search
 
 logger = get_task_logger(__name__)
 
 
+@shared_task(
+    autoretry_for=(DatabaseError,),
+    retry_backoff=True,
+    retry_backoff_max=10 * 60,
+    max_retries=8,
+)
+def post_schedule_create(post_ids, *args, **kwargs):
+    """
+    Publish one or many posts. Publishing skips visible posts, so a
+    redelivered or retried task publishes and fans out nothing twice.
+    """
+    if isinstance(post_ids, int):
+        post_ids = [post_ids]
+
+    published_ids = scheduling.publish(post_ids)
+
+    if published_ids:
+        # Profile details preview the published posts too
+        bump_version("post", "user_profile")
+
+    logger.info(
+        f"Posts set to visible successfully. Post IDs: {published_ids}"
+    )
+
+    for post_id in published_ids:
+        post_fan_out.delay(post_id)
+
+
+@shared_task
+def post_publish_scheduled(batch_size=1000):
+    """Sweep due scheduled posts, until none is left, and fan them out"""
+    published = 0
+
+    while True:
+        post_ids, lags = scheduling.publish_due(batch_size)
+
+        if not post_ids:
+            break
+
+        published += len(post_ids)
+        bump_version("post", "user_profile")
+        logger.info(
+            f"{len(post_ids)} scheduled posts published, publish lag "
+            f"max {max(lags):.1f}s, mean {sum(lags) / len(lags):.1f}s"
+        )
+
+        for post_id in post_ids:
+            post_fan_out.delay(post_id)
+
+    return published
+
+
+@shared_task
+def post_fan_out(post_id):
+    created = feed.fan_out(post_id)
+
+    logger.info(f"Post fanned out to {created} timelines. Post ID: {post_id}")
+
+
+@shared_task
+def timeline_backfill(owner_id, author_id):
+    created = feed.backfill(owner_id, author_id)
+
+    logger.info(
+        f"{created} posts of user {author_id} added to timeline of {owner_id}"
+    )
+
+
+@shared_task
+def timeline_prune(owner_id, author_id):
+    deleted = feed.prune(owner_id, author_id)
+
+    logger.info(
+        f"{deleted} posts of user {author_id} removed from timeline "
+        f"of {owner_id}"
+    )
+
+
+@shared_task
+def post_search_update(post_ids, batch_size=1000):
+    for start in range(0, len(post_ids), batch_size):
+        search.update_index(post_ids[start : start + batch_size])
+
+    logger.info(f"Search index updated for {len(post_ids)} posts")
+
+
 @shared_task
-def post_schedule_create(post_id, *args, **kwargs):
-    post = Post.objects.get(pk=post_id)
-    post.is_visible = True
-    post.save()
+def like_buffer_flush(batch_size=1000):
+    flushed = likes.flush(batch_size)
 
-    logger.info(f"Post set to visible successfully. Post ID: {post_id}")
+    logger.info(f"Buffered likes of {flushed} posts written")
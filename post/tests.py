@@ -0,0 +1,820 @@
+from datetime import timedelta
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
+
+import fakeredis
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.permissions import IsOwnerOnly, IsOwnerOrReadOnly
+from post import feed, likes, scheduling, search
+from post.models import Comment, HashTag, Like, Post
+from user.models import User
+from user_profile.models import UserProfile, UserProfileFollow
+
+
+def create_user(i):
+    user = User.objects.create_user(email=f"user{i}@test.com", password="pass")
+    profile = UserProfile.objects.create(created_by=user)
+
+    return user, profile
+
+
+def create_posts(users, count):
+    """Create posts with a hashtag, a like and a comment of every user"""
+    hashtag, _ = HashTag.objects.get_or_create(name="django")
+    posts = []
+
+    for i in range(count):
+        user, profile = users[i % len(users)]
+        post = Post.objects.create(
+            created_by=user, profile=profile, title=f"Post {i}", content="c"
+        )
+        post.hashtags.add(hashtag)
+
+        for liker, _ in users:
+            Like.objects.create(post=post, created_by=liker)
+            Comment.objects.create(post=post, created_by=liker, content="c")
+
+        Post.objects.filter(pk=post.pk).update(
+            likes_count=len(users), comments_count=len(users)
+        )
+        UserProfile.objects.filter(pk=profile.pk).update(
+            posts_count=F("posts_count") + 1
+        )
+        posts.append(post)
+
+    return posts
+
+
+class PostViewSetQueryCountTests(TestCase):
+    """Query counts of post reads must not grow with the rows they render"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [create_user(i) for i in range(3)]
+        cls.posts = create_posts(cls.users, 5)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.users[0][0])
+
+    def test_list(self):
+        # Cache scope, count, posts, hashtags, validators and viewer likes
+        with self.assertNumQueries(6):
+            response = self.client.get("/api/post/posts/")
+
+        self.assertEqual(len(response.data["results"]), 3)
+
+        create_posts(self.users, 5)
+        cache.clear()
+
+        with self.assertNumQueries(6):
+            response = self.client.get("/api/post/posts/?page=3")
+
+        self.assertEqual(len(response.data["results"]), 3)
+
+    def test_retrieve(self):
+        # Cache scope, post, hashtags, the like and comment previews,
+        # validators and viewer likes
+        with self.assertNumQueries(7):
+            response = self.client.get(f"/api/post/posts/{self.posts[0].id}/")
+
+        self.assertEqual(len(response.data["likes"]), 3)
+        self.assertEqual(len(response.data["comments"]), 3)
+
+    def test_cached_list(self):
+        self.client.get("/api/post/posts/")
+
+        # Only the cache scope and the likes of the viewer
+        with self.assertNumQueries(2):
+            self.client.get("/api/post/posts/")
+
+        anonymous = APIClient()
+
+        with self.assertNumQueries(0):
+            anonymous.get("/api/post/posts/")
+
+
+class PostCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [create_user(i) for i in range(3)]
+        cls.posts = create_posts(cls.users[:2], 2)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.users[2][0])
+
+    def get_post(self, post, client=None):
+        return (client or self.client).get(f"/api/post/posts/{post.id}/")
+
+    def test_viewer_fields(self):
+        owner = APIClient()
+        owner.force_authenticate(self.users[0][0])
+
+        response = self.get_post(self.posts[0], owner)
+        self.assertTrue(response.data["is_liked"])
+        self.assertTrue(response.data["is_owner"])
+
+        # Served from the entry cached for the owner
+        with self.assertNumQueries(2):
+            response = self.get_post(self.posts[0])
+
+        self.assertFalse(response.data["is_liked"])
+        self.assertFalse(response.data["is_owner"])
+
+        anonymous = APIClient().get("/api/post/posts/")
+        self.assertEqual(
+            {post["is_liked"] for post in anonymous.data["results"]}, {False}
+        )
+
+    def test_like_drops_only_the_post_detail(self):
+        self.get_post(self.posts[0])
+        self.get_post(self.posts[1])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/api/post/likes/", {"post": self.posts[0].id})
+
+        response = self.get_post(self.posts[0])
+        self.assertEqual(response.data["likes_count"], 3)
+        self.assertTrue(response.data["is_liked"])
+
+        with self.assertNumQueries(2):
+            self.get_post(self.posts[1])
+
+
+class PostConditionalRequestTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [create_user(0)]
+        cls.posts = create_posts(cls.users, 3)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.users[0][0])
+
+    def test_no_last_modified(self):
+        response = self.client.get("/api/post/posts/")
+
+        self.assertIn("ETag", response)
+        self.assertNotIn("Last-Modified", response)
+        self.assertEqual(
+            self.client.get(
+                "/api/post/posts/",
+                HTTP_IF_MODIFIED_SINCE="Fri, 01 Jan 2100 00:00:00 GMT",
+            ).status_code,
+            200,
+        )
+
+    def test_etag_changes_after_delete(self):
+        etag = self.client.get("/api/post/posts/")["ETag"]
+
+        self.assertEqual(
+            self.client.get(
+                "/api/post/posts/", HTTP_IF_NONE_MATCH=etag
+            ).status_code,
+            304,
+        )
+
+        # Not the latest post, so the latest updated_at stays the same
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f"/api/post/posts/{self.posts[0].id}/")
+
+        response = self.client.get("/api/post/posts/", HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 2)
+
+
+class LikeBatchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [create_user(i) for i in range(2)]
+        cls.posts = create_posts(cls.users[:1], 3)
+        Post.objects.filter(pk=cls.posts[2].pk).update(is_visible=False)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.users[1][0])
+
+    def batch(self, like=(), unlike=()):
+        return self.client.post(
+            "/api/post/likes/batch/",
+            {"like": list(like), "unlike": list(unlike)},
+            format="json",
+        )
+
+    def test_counts_only_changed_likes(self):
+        first, second, hidden = self.posts
+        updated_at = Post.objects.get(pk=second.pk).updated_at
+
+        response = self.batch(like=[first.id, hidden.id])
+        self.assertEqual(response.data, {"like": [first.id], "unlike": []})
+
+        # Liking again and unliking a post never liked change nothing
+        self.batch(like=[first.id], unlike=[second.id])
+        self.batch(unlike=[first.id])
+        self.batch(unlike=[first.id])
+
+        counts = dict(Post.objects.values_list("id", "likes_count"))
+        self.assertEqual(counts, {first.id: 1, second.id: 1, hidden.id: 1})
+        self.assertFalse(
+            Like.objects.filter(created_by=self.users[1][0]).exists()
+        )
+        self.assertEqual(Post.objects.get(pk=second.pk).updated_at, updated_at)
+
+    def test_counts_rows_written_meanwhile(self):
+        first, second, hidden = self.posts
+        user = self.users[1][0]
+        self.batch(like=[first.id, second.id])
+
+        def unlike_meanwhile(*args):
+            # An overlapping request unlikes after the batch read the posts
+            Like.objects.filter(post=first, created_by=user).delete()
+            Post.objects.filter(pk=first.pk).update(
+                likes_count=F("likes_count") - 1
+            )
+            return False
+
+        with mock.patch(
+            "post.views.LikeViewSet.buffer_likes", side_effect=unlike_meanwhile
+        ):
+            self.batch(unlike=[first.id, second.id])
+
+        self.batch(unlike=[first.id, second.id])
+
+        counts = dict(Post.objects.values_list("id", "likes_count"))
+        self.assertEqual(counts, {first.id: 1, second.id: 1, hidden.id: 1})
+
+
+@override_settings(LIKE_WRITE_BEHIND=True)
+class LikeBufferTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [create_user(i) for i in range(3)]
+        cls.posts = create_posts(cls.users[:1], 2)
+
+    def setUp(self):
+        cache.clear()
+        self.redis = fakeredis.FakeRedis(decode_responses=True)
+        patcher = mock.patch("post.likes.get_redis", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_client(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+
+        return client
+
+    def batch(self, user, like=(), unlike=()):
+        response = self.get_client(user).post(
+            "/api/post/likes/batch/",
+            {"like": list(like), "unlike": list(unlike)},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 202)
+
+    def flush(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return likes.flush()
+
+    def get_counts(self):
+        return dict(Post.objects.values_list("id", "likes_count"))
+
+    def test_flush(self):
+        first, second = self.posts
+        liker = self.users[1][0]
+        self.batch(liker, like=[first.id, second.id])
+        self.batch(self.users[0][0], unlike=[first.id])
+
+        response = self.get_client(liker).get("/api/post/posts/")
+        self.assertEqual(
+            {
+                post["id"]: post["likes_count"]
+                for post in response.data["results"]
+            },
+            {first.id: 1, second.id: 2},
+        )
+        self.assertEqual(self.flush(), 2)
+        self.assertEqual(self.get_counts(), {first.id: 1, second.id: 2})
+        self.assertEqual(self.flush(), 0)
+        self.assertEqual(self.redis.keys("likes:*"), [])
+
+    def test_flush_after_user_deleted(self):
+        first, second = self.posts
+        user = self.users[2][0]
+        Like.objects.create(post=first, created_by=user)
+        self.batch(self.users[1][0], like=[second.id])
+        self.batch(user, like=[second.id], unlike=[first.id])
+        # Deleting the user cascades to its like of the first post
+        user.delete()
+
+        self.assertEqual(self.flush(), 2)
+        self.assertEqual(self.get_counts(), {first.id: 1, second.id: 2})
+        self.assertEqual(self.redis.keys("likes:*"), [])
+
+    def test_flush_skips_likes_written_directly(self):
+        first, _ = self.posts
+        liker = self.users[1][0]
+        self.batch(liker, like=[first.id])
+        # Written synchronously while Redis was unreachable
+        Like.objects.create(post=first, created_by=liker)
+        Post.objects.filter(pk=first.pk).update(likes_count=2)
+
+        self.flush()
+
+        self.assertEqual(Post.objects.get(pk=first.pk).likes_count, 2)
+
+    def test_retry_after_failed_flush(self):
+        first, _ = self.posts
+        self.batch(self.users[1][0], like=[first.id])
+
+        with mock.patch("post.likes.insert", side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.flush()
+
+        self.assertEqual(likes.get_pending_counts([first.id]), {first.id: 1})
+        self.batch(self.users[2][0], like=[first.id])
+
+        self.assertEqual(self.flush(), 1)
+        self.assertEqual(Post.objects.get(pk=first.pk).likes_count, 3)
+        self.assertEqual(self.redis.keys("likes:*"), [])
+
+    def test_unlike_during_flush(self):
+        first, _ = self.posts
+        liker = self.users[1][0]
+        self.batch(liker, like=[first.id])
+        write_pending = likes.write_pending
+
+        def unlike_meanwhile(pending):
+            # The rows of the flush are not committed yet
+            self.batch(liker, unlike=[first.id])
+            write_pending(pending)
+
+        with mock.patch(
+            "post.likes.write_pending", side_effect=unlike_meanwhile
+        ):
+            self.flush()
+
+        self.assertEqual(likes.get_user_pending(liker.id), (set(), {first.id}))
+        self.flush()
+
+        self.assertFalse(Like.objects.filter(created_by=liker).exists())
+        self.assertEqual(Post.objects.get(pk=first.pk).likes_count, 1)
+
+
+class PostSchedulingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [create_user(0)]
+        cls.post = create_posts(cls.users, 1)[0]
+        Post.objects.filter(pk=cls.post.pk).update(
+            is_visible=False,
+            scheduled_time=timezone.now() - timedelta(minutes=1),
+        )
+
+    def test_publish_due(self):
+        with mock.patch("post.hashtags.record_usage") as record_usage:
+            with self.captureOnCommitCallbacks(execute=True):
+                post_ids, _ = scheduling.publish_due()
+
+        self.assertEqual(post_ids, [self.post.id])
+        record_usage.assert_called_once_with(["django"])
+
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertTrue(post.is_visible)
+        self.assertIsNone(post.scheduled_time)
+
+        # Hidden by the author after it was published
+        Post.objects.filter(pk=post.pk).update(is_visible=False)
+        self.assertEqual(scheduling.publish_due(), ([], []))
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [create_user(i) for i in range(2)]
+        cls.posts = create_posts(cls.users[:1], 7)
+        # Followed before the timelines were filled
+        UserProfileFollow.objects.create(
+            created_by=cls.users[1][0], following=cls.users[0][0]
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.users[1][0])
+
+    def get_feed(self):
+        pages = []
+        url = "/api/post/posts/feed/"
+
+        while url:
+            response = self.client.get(url)
+            pages.append([post["id"] for post in response.data["results"]])
+            url = response.data["next"]
+
+        return pages
+
+    def test_backfill_timelines(self):
+        self.assertEqual(self.get_feed(), [[]])
+
+        call_command("backfill_timelines", stdout=StringIO())
+
+        self.assertEqual(
+            sum(self.get_feed(), []),
+            sorted((post.id for post in self.posts), reverse=True),
+        )
+
+    def test_full_pages_after_hidden_posts(self):
+        feed.backfill_all()
+        hidden = self.posts[2:6]
+        Post.objects.filter(pk__in=[post.pk for post in hidden]).update(
+            is_visible=False
+        )
+
+        self.assertEqual(
+            self.get_feed(),
+            [[self.posts[6].id, self.posts[1].id, self.posts[0].id]],
+        )
+
+
+class PostCursorPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [create_user(0)]
+        cls.posts = create_posts(cls.users, 7)
+        # Rows with an equal timestamp are told apart by id alone
+        Post.objects.update(created_at=timezone.now())
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def get_pages(self, url, link):
+        """Follow the next or previous links, return ids and the last url"""
+        pages = []
+
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([post["id"] for post in response.data["results"]])
+            last_url, url = url, response.data[link]
+
+        return pages, last_url
+
+    def test_equal_created_at(self):
+        expected = sorted((post.id for post in self.posts), reverse=True)
+        pages, last_url = self.get_pages(
+            "/api/post/posts/?pagination=cursor", "next"
+        )
+
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual(sum(pages, []), expected)
+
+        previous_pages, _ = self.get_pages(last_url, "previous")
+
+        self.assertEqual(previous_pages, pages[::-1])
+
+    def test_search_rejects_cursor(self):
+        response = self.client.get("/api/post/posts/?q=post&pagination=cursor")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("pagination", response.data)
+
+
+class PostSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [create_user(0)]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.users[0][0])
+        self.title_post = self.create_post(
+            "Pasta", "Pasta with tomatoes #italian"
+        )
+        self.content_post = self.create_post(
+            "Dinner", "A long evening and then some pasta at last"
+        )
+
+    def create_post(self, title, content):
+        response = self.client.post(
+            "/api/post/posts/", {"title": title, "content": content}
+        )
+        self.assertEqual(response.status_code, 201)
+
+        return response.data["id"]
+
+    def search(self, query):
+        response = self.client.get("/api/post/posts/", {"q": query})
+        self.assertEqual(response.status_code, 200)
+
+        return [post["id"] for post in response.data["results"]]
+
+    def test_ranked_search(self):
+        self.assertEqual(
+            self.search("pasta"), [self.title_post, self.content_post]
+        )
+        self.assertEqual(self.search("italian"), [self.title_post])
+        self.assertEqual(self.search('"weird AND ('), [])
+
+    def test_index_follows_writes(self):
+        self.client.patch(
+            f"/api/post/posts/{self.title_post}/", {"content": "Salad"}
+        )
+        self.assertEqual(self.search("tomatoes"), [])
+        self.assertEqual(self.search("salad"), [self.title_post])
+
+        self.client.delete(f"/api/post/posts/{self.content_post}/")
+        self.assertEqual(self.search("evening"), [])
+
+    def test_rebuild_search_index(self):
+        search.clear_index()
+        Post.objects.update(search_vector=None)
+        call_command("rebuild_search_index", stdout=StringIO())
+
+        self.assertEqual(self.search("tomatoes"), [self.title_post])
+
+    def test_sqlite_match_join(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("FTS5 is used on SQLite only")
+
+        queryset = search.search(Post.objects.all(), 'pasta "at')
+
+        self.assertIn(
+            f"{search.SQLITE_SEARCH_TABLE} MATCH", str(queryset.query)
+        )
+        self.assertEqual(
+            list(queryset.values_list("id", flat=True)), [self.content_post]
+        )
+        ranks = dict(
+            search.search(Post.objects.all(), "pasta").values_list(
+                "id", "search_rank"
+            )
+        )
+        self.assertGreater(ranks[self.title_post], ranks[self.content_post])
+
+
+class CommentThreadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [create_user(0)]
+        cls.post = create_posts(cls.users, 1)[0]
+        Comment.objects.all().delete()
+        Post.objects.update(comments_count=0)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.users[0][0])
+        self.root = self.comment()
+        self.reply = self.comment(self.root)
+        self.nested_reply = self.comment(self.reply)
+        self.other_root = self.comment()
+        self.other_reply = self.comment(self.other_root)
+
+    def comment(self, parent=None):
+        response = self.client.post(
+            "/api/post/comments/",
+            {"post": self.post.id, "parent": parent, "content": "c"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+
+        return response.data["id"]
+
+    def get_thread(self, comment_id):
+        response = self.client.get(f"/api/post/comments/{comment_id}/thread/")
+
+        return [(c["id"], c["depth"]) for c in response.data["results"]]
+
+    def test_thread_order(self):
+        self.assertEqual(
+            self.get_thread(self.root),
+            [(self.root, 0), (self.reply, 1), (self.nested_reply, 2)],
+        )
+
+        response = self.client.get(f"/api/post/posts/{self.post.id}/comments/")
+        self.assertEqual(
+            [comment["id"] for comment in response.data["results"]],
+            [
+                self.root,
+                self.reply,
+                self.nested_reply,
+                self.other_root,
+                self.other_reply,
+            ],
+        )
+
+    def test_destroy_deletes_replies(self):
+        self.assertEqual(Post.objects.get(pk=self.post.pk).comments_count, 5)
+
+        response = self.client.delete(f"/api/post/comments/{self.reply}/")
+        self.assertEqual(response.status_code, 204)
+
+        self.assertEqual(
+            set(Comment.objects.values_list("id", flat=True)),
+            {self.root, self.other_root, self.other_reply},
+        )
+        self.assertEqual(Post.objects.get(pk=self.post.pk).comments_count, 3)
+
+        self.client.delete(f"/api/post/comments/{self.other_root}/")
+        self.assertEqual(Post.objects.get(pk=self.post.pk).comments_count, 1)
+        self.assertEqual(self.get_thread(self.root), [(self.root, 0)])
+
+
+class OwnerPermissionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [create_user(i) for i in range(2)]
+        cls.post = create_posts(cls.users[:1], 1)[0]
+
+    def get_request(self, method, user):
+        return SimpleNamespace(method=method, user=user)
+
+    def test_ownership_without_author_query(self):
+        owner, other = self.users[0][0], self.users[1][0]
+        post = Post.objects.only("id", "created_by_id").get(pk=self.post.pk)
+
+        with self.assertNumQueries(0):
+            self.assertTrue(
+                IsOwnerOnly().has_object_permission(
+                    self.get_request("DELETE", owner), None, post
+                )
+            )
+            self.assertFalse(
+                IsOwnerOnly().has_object_permission(
+                    self.get_request("GET", other), None, post
+                )
+            )
+
+        for method, allowed in (("GET", True), ("DELETE", False)):
+            with self.subTest(method=method):
+                self.assertEqual(
+                    IsOwnerOrReadOnly().has_object_permission(
+                        self.get_request(method, other), None, post
+                    ),
+                    allowed,
+                )
+
+    def test_delete_by_other_user(self):
+        client = APIClient()
+        client.force_authenticate(self.users[1][0])
+        url = f"/api/post/posts/{self.post.id}/"
+
+        self.assertEqual(client.delete(url).status_code, 403)
+
+        client.force_authenticate(self.users[0][0])
+        self.assertEqual(client.delete(url).status_code, 204)
+
+
+class PostIndexTests(TestCase):
+    """
+    The queries issued by the views and the scheduled sweep must use the
+    indexes added for them. Checks of an index the backend cannot use are
+    skipped, trigram indexes exist on PostgreSQL only.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [create_user(i) for i in range(2)]
+        cls.posts = create_posts(cls.users, 2)
+        Post.objects.filter(pk=cls.posts[0].pk).update(
+            is_visible=False, scheduled_time=timezone.now()
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.users[0][0])
+
+        if connection.vendor == "postgresql":
+            # The test tables are small enough for a seq scan
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+
+    @staticmethod
+    def explain(sql):
+        if connection.vendor == "sqlite":
+            sql = f"EXPLAIN QUERY PLAN {sql}"
+        else:
+            sql = f"EXPLAIN {sql}"
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql)
+            return "\n".join(str(row) for row in cursor.fetchall())
+
+    def assertIndexUsed(self, index, vendors, run):
+        """Assert a SELECT issued by run() is planned with the index"""
+        if connection.vendor not in vendors:
+            self.skipTest(f"{index} is not used by {connection.vendor}")
+
+        with CaptureQueriesContext(connection) as queries:
+            run()
+
+        plans = [
+            self.explain(query["sql"])
+            for query in queries
+            if query["sql"].startswith("SELECT")
+        ]
+
+        self.assertTrue(
+            any(index in plan for plan in plans),
+            f"{index} is missing from the query plans:\n" + "\n".join(plans),
+        )
+
+    def get_posts(self, query=""):
+        response = self.client.get(f"/api/post/posts/{query}")
+        self.assertEqual(response.status_code, 200)
+
+    def test_visible_list(self):
+        # SQLite prefers scanning the created_at index in order
+        self.assertIndexUsed(
+            "post_visible_created_at_idx", ("postgresql",), self.get_posts
+        )
+
+    def test_profile_filter(self):
+        # Profile pages are read newest first through the cursor
+        self.assertIndexUsed(
+            "post_profile_created_at_idx",
+            ("postgresql", "sqlite"),
+            lambda: self.get_posts(
+                f"?pagination=cursor&profile={self.users[1][1].id}"
+            ),
+        )
+
+    def test_hidden_posts_scope(self):
+        self.assertIndexUsed(
+            "post_hidden_created_by_idx",
+            ("postgresql", "sqlite"),
+            self.get_posts,
+        )
+
+    def test_liked_filter(self):
+        self.assertIndexUsed(
+            "like_created_by_post_idx",
+            ("postgresql", "sqlite"),
+            lambda: self.get_posts("?liked=1"),
+        )
+
+    def test_title_filter(self):
+        self.assertIndexUsed(
+            "post_title_trgm_idx",
+            ("postgresql",),
+            lambda: self.get_posts("?title=post"),
+        )
+
+    def test_author_filters(self):
+        for field in ("email", "first_name", "last_name", "username"):
+            with self.subTest(field=field):
+                self.assertIndexUsed(
+                    f"user_{field}_trgm_idx",
+                    ("postgresql",),
+                    lambda: self.get_posts(f"?{field}=user"),
+                )
+
+    def test_search(self):
+        self.assertIndexUsed(
+            "post_search_vector_idx",
+            ("postgresql",),
+            lambda: self.get_posts("?q=post"),
+        )
+
+    def test_post_likes(self):
+        post = self.posts[1]
+
+        self.assertIndexUsed(
+            "like_post_created_at_idx",
+            ("postgresql", "sqlite"),
+            lambda: self.client.get(f"/api/post/posts/{post.id}/likes/"),
+        )
+
+    def test_comment_thread(self):
+        comment = self.posts[1].comments.first()
+
+        self.assertIndexUsed(
+            "comment_post_path_idx",
+            ("postgresql", "sqlite"),
+            lambda: self.client.get(
+                f"/api/post/comments/{comment.id}/thread/"
+            ),
+        )
+
+    def test_scheduled_sweep(self):
+        self.assertIndexUsed(
+            "post_scheduled_time_idx",
+            ("postgresql", "sqlite"),
+            scheduling.publish_due,
+        )
@@ -1,29 +1,61 @@
+import base64
+import binascii
 import pytz
 from datetime import datetime
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
-from rest_framework.exceptions import ValidationError
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import (
+    BasePagination,
+    CursorPagination,
+    PageNumberPagination,
+    replace_query_param,
+)
 from rest_framework.permissions import (
     IsAuthenticatedOrReadOnly,
     IsAuthenticated,
 )
 from rest_framework.response import Response
-from django.db.models import Count, Q
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import (
+    BooleanField,
+    Exists,
+    ExpressionWrapper,
+    F,
+    OuterRef,
+    Prefetch,
+    Q,
+)
+from django.db.models.functions import Now
 from drf_spectacular.types import OpenApiTypes
+from redis import RedisError
 from drf_spectacular.utils import (
     extend_schema,
     OpenApiParameter,
 )
 
+from api.cache import (
+    CachedResponseMixin,
+    CacheInvalidationMixin,
+    bump_objects,
+)
+from api.pagination import CreatedAtCursorPagination, CursorPaginationMixin
 from api.permissions import IsOwnerOrReadOnly, IsOwnerOnly
-from post.tasks import post_schedule_create
+from post import hashtags, likes, search
+from post.feed import get_feed_page
+from post.tasks import (
+    post_fan_out,
+    post_search_update,
+)
 from user.views import CoreModelMixin
 from user_profile.models import UserProfile
-from post.models import HashTag, Like, Comment, Post
+from post.models import HashTag, Like, Comment, Post, normalize_hashtag
 from post.serializers import (
     HashTagSerializer,
+    TrendingHashTagSerializer,
     LikeSerializer,
+    LikeBatchSerializer,
     CommentSerializer,
     PostSerializer,
     PostListSerializer,
@@ -33,22 +65,241 @@ from post.serializers import (
 )
 
 
-class HashTagViewSet(viewsets.ModelViewSet):
+class HashTagViewSet(CacheInvalidationMixin, viewsets.ModelViewSet):
     queryset = HashTag.objects.all()
     serializer_class = HashTagSerializer
+    invalidated_namespaces = ("post",)
+
+    @staticmethod
+    def get_post_ids(hashtag):
+        return list(hashtag.posts.values_list("id", flat=True))
+
+    # Hashtag names are part of the search index of their posts
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        post_ids = self.get_post_ids(serializer.instance)
+        transaction.on_commit(lambda: post_search_update.delay(post_ids))
+
+    def perform_destroy(self, instance):
+        post_ids = self.get_post_ids(instance)
+        super().perform_destroy(instance)
+        transaction.on_commit(lambda: post_search_update.delay(post_ids))
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="limit",
+                description="Number of hashtags (ex. ?limit=10)",
+                type=OpenApiTypes.INT,
+            ),
+        ],
+        responses=TrendingHashTagSerializer(many=True),
+    )
+    @action(methods=["GET"], detail=False, pagination_class=None)
+    def trending(self, request):
+        """Endpoint for the most used hashtags of the last hours"""
+        try:
+            limit = min(int(request.query_params.get("limit", 10)), 100)
+        except ValueError:
+            raise ValidationError({"limit": "A valid integer is required."})
+
+        serializer = TrendingHashTagSerializer(
+            [
+                {"name": name, "score": score}
+                for name, score in hashtags.get_trending(max(limit, 1))
+            ],
+            many=True,
+        )
+
+        return Response(serializer.data)
+
+
+class PostCounterMixin:
+    """
+    Keep the denormalized counter of the related post in sync and drop
+    the cached detail responses of the posts written to
+    """
+
+    counter_field = None
+
+    @staticmethod
+    def invalidate_posts(post_ids):
+        post_ids = list(post_ids)
+        transaction.on_commit(lambda: bump_objects("post", post_ids))
 
+    def update_post_counter(self, post_id, delta):
+        Post.objects.filter(pk=post_id).update(
+            updated_at=Now(),
+            **{self.counter_field: F(self.counter_field) + delta},
+        )
+        self.invalidate_posts([post_id])
 
-class LikeViewSet(CoreModelMixin, viewsets.ModelViewSet):
-    queryset = Like.objects.all()
+    @transaction.atomic
+    def perform_create(self, serializer, *args, **kwargs):
+        instance = super().perform_create(serializer, *args, **kwargs)
+        self.update_post_counter(instance.post_id, 1)
+
+        return instance
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        previous_post_id = serializer.instance.post_id
+        super().perform_update(serializer)
+        instance = serializer.instance
+
+        if instance.post_id != previous_post_id:
+            self.update_post_counter(previous_post_id, -1)
+            self.update_post_counter(instance.post_id, 1)
+        else:
+            self.invalidate_posts([instance.post_id])
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        self.update_post_counter(instance.post_id, -1)
+
+
+class LikeViewSet(
+    PostCounterMixin,
+    CoreModelMixin,
+    viewsets.ModelViewSet,
+):
+    queryset = Like.objects.select_related("created_by")
     serializer_class = LikeSerializer
+    counter_field = "likes_count"
     permission_classes = [
         IsAuthenticatedOrReadOnly,
         IsOwnerOrReadOnly,
     ]
 
+    def get_serializer_class(self):
+        if self.action == "batch":
+            return LikeBatchSerializer
+
+        return LikeSerializer
+
+    def buffer_likes(self, like_ids=(), unlike_ids=()):
+        """
+        Buffer the likes in Redis when write-behind is on, return whether
+        they were. The database is written directly when Redis is down.
+        """
+        if not likes.is_enabled():
+            return False
+
+        try:
+            likes.buffer(self.request.user.id, like_ids, unlike_ids)
+        except RedisError:
+            return False
+
+        self.invalidate_posts([*like_ids, *unlike_ids])
+
+        return True
+
+    def create(self, request, *args, **kwargs):
+        """Liking a post twice returns the existing like"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        post = serializer.validated_data["post"]
+
+        if self.buffer_likes(like_ids=[post.id]):
+            return Response(
+                {"post": post.id, "created_by": request.user.id},
+                status=status.HTTP_202_ACCEPTED,
+            )
+
+        try:
+            self.perform_create(serializer)
+        except IntegrityError:
+            like = Like.objects.get(
+                post=serializer.validated_data["post"],
+                created_by_id=request.user.id,
+            )
+            return Response(self.get_serializer(like).data)
+
+        headers = self.get_success_headers(serializer.data)
+
+        return Response(
+            serializer.data, status=status.HTTP_201_CREATED, headers=headers
+        )
+
+    def destroy(self, request, *args, **kwargs):
+        instance = self.get_object()
+
+        if self.buffer_likes(unlike_ids=[instance.post_id]):
+            return Response(status=status.HTTP_202_ACCEPTED)
+
+        self.perform_destroy(instance)
 
-class CommentViewSet(CoreModelMixin, viewsets.ModelViewSet):
-    queryset = Comment.objects.all()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(
+        methods=["POST"],
+        detail=False,
+        permission_classes=[IsAuthenticated],
+    )
+    def batch(self, request):
+        """Endpoint for liking and unliking many posts in one request"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user = request.user
+        requested_like_ids = set(serializer.validated_data["like"])
+        requested_unlike_ids = set(serializer.validated_data["unlike"])
+
+        # Hidden posts of other users can be unliked but not liked
+        posts = Post.objects.filter(
+            pk__in=requested_like_ids | requested_unlike_ids
+        ).annotate(
+            visible=ExpressionWrapper(
+                Post.get_visibility_filter(user), output_field=BooleanField()
+            )
+        )
+        like_ids, unlike_ids = [], []
+
+        for post_id, visible in posts.values_list("id", "visible").order_by(
+            "id"
+        ):
+            if post_id in requested_like_ids and visible:
+                like_ids.append(post_id)
+            elif post_id in requested_unlike_ids:
+                unlike_ids.append(post_id)
+
+        if self.buffer_likes(like_ids, unlike_ids):
+            return Response(
+                {"like": like_ids, "unlike": unlike_ids},
+                status=status.HTTP_202_ACCEPTED,
+            )
+
+        # Counted from the rows written, so overlapping batches of the
+        # same user never count a like twice
+        with transaction.atomic():
+            inserted_ids = likes.insert(
+                (post_id, user.id) for post_id in like_ids
+            )
+            deleted_ids = likes.delete(
+                Q(created_by_id=user.id, post_id__in=unlike_ids)
+            )
+            self.invalidate_posts(
+                likes.apply_counts(inserted_ids, deleted_ids)
+            )
+
+        return Response({"like": like_ids, "unlike": unlike_ids})
+
+
+class CommentThreadPagination(CursorPagination):
+    """Keyset pagination of a thread in reply order"""
+
+    page_size = 50
+    ordering = ("path",)
+
+
+class CommentViewSet(
+    CursorPaginationMixin,
+    PostCounterMixin,
+    CoreModelMixin,
+    viewsets.ModelViewSet,
+):
+    queryset = Comment.objects.select_related("created_by", "post")
+    counter_field = "comments_count"
     permission_classes = [
         IsOwnerOrReadOnly,
     ]
@@ -59,32 +310,204 @@ class CommentViewSet(CoreModelMixin, viewsets.ModelViewSet):
 
         return CommentSerializer
 
+    def filter_queryset(self, queryset):
+        post = self.request.query_params.get("post")
+        root = self.request.query_params.get("root")
+
+        if post:
+            try:
+                queryset = queryset.filter(post_id=int(post))
+            except ValueError:
+                raise ValidationError({"post": "Expected a post id."})
+
+        if root:
+            queryset = queryset.filter(parent__isnull=True)
+
+        return queryset
+
+    # Replies are deleted with one range query over the thread instead of
+    # a cascade, and counted off the post together with the comment
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        _, deleted = Comment.objects.filter(
+            instance.get_thread_filter(include_self=False)
+        ).delete()
+        replies_count = deleted.get(Comment._meta.label, 0)
+
+        if replies_count:
+            self.update_post_counter(instance.post_id, -replies_count)
+
+        super().perform_destroy(instance)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="post",
+                description="Filter by post id (ex. ?post=2)",
+                type=OpenApiTypes.INT,
+            ),
+            OpenApiParameter(
+                name="root",
+                description="Only comments that are not replies (ex. ?root=1)",
+                type=OpenApiTypes.BOOL,
+            ),
+            OpenApiParameter(
+                name="pagination",
+                description=(
+                    "Paginate by creation time with a cursor "
+                    "(ex. ?pagination=cursor)"
+                ),
+                type=OpenApiTypes.STR,
+                enum=["cursor"],
+            ),
+        ],
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @extend_schema(responses=CommentSerializer(many=True))
+    @action(
+        methods=["GET"],
+        detail=True,
+        pagination_class=CommentThreadPagination,
+    )
+    def thread(self, request, pk=None):
+        """Endpoint for a comment and all replies below it in reply order"""
+        comment = self.get_object()
+        queryset = self.get_queryset().filter(comment.get_thread_filter())
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+
+        return self.get_paginated_response(serializer.data)
+
 
 class PostPagination(PageNumberPagination):
     page_size = 3
     max_page_size = 100
 
 
-class PostViewSet(CoreModelMixin, viewsets.ModelViewSet):
-    queryset = Post.objects.all()
+class FeedPagination(BasePagination):
+    """Keyset pagination over the precomputed home timeline"""
+
+    page_size = 3
+    max_fetch_size = 100
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        position = self.decode_cursor(request)
+        fetch_size = self.page_size
+        page = []
+
+        # Entries of posts hidden since or filtered out leave gaps, so the
+        # timeline is read on in growing steps until the page is full
+        while True:
+            post_ids, next_position = get_feed_page(
+                request.user.id, position, fetch_size
+            )
+            posts = queryset.in_bulk(post_ids)
+            found = [
+                posts[post_id] for post_id in post_ids if post_id in posts
+            ]
+            missing = self.page_size - len(page)
+            page += found[:missing]
+
+            if len(found) > missing:
+                self.next_position = (page[-1].created_at, page[-1].id)
+                break
+
+            if next_position is None or len(page) == self.page_size:
+                self.next_position = next_position
+                break
+
+            position = next_position
+            fetch_size = min(fetch_size * 2, self.max_fetch_size)
+
+        return page
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True},
+                "results": schema,
+            },
+        }
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+
+        if encoded is None:
+            return None
+
+        try:
+            querystring = base64.urlsafe_b64decode(encoded).decode()
+            created_at, post_id = querystring.split("|")
+            return datetime.fromisoformat(created_at), int(post_id)
+        except (TypeError, ValueError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+
+        created_at, post_id = self.next_position
+        querystring = f"{created_at.isoformat()}|{post_id}"
+        encoded = base64.urlsafe_b64encode(querystring.encode()).decode()
+
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded
+        )
+
+
+class PostViewSet(
+    CachedResponseMixin,
+    CacheInvalidationMixin,
+    CursorPaginationMixin,
+    CoreModelMixin,
+    viewsets.ModelViewSet,
+):
+    queryset = Post.objects.defer("search_vector")
     pagination_class = PostPagination
+    cache_namespace = "post"
+    invalidated_namespaces = ("post", "user_profile")
     permission_classes = [
         IsAuthenticatedOrReadOnly,
         IsOwnerOrReadOnly,
     ]
 
     def get_queryset(self):
-        queryset = self.queryset.annotate(
-            likes_count=(Count("likes", distinct=True)),
-            comments_count=(Count("comments", distinct=True)),
-        )
+        queryset = self.queryset
 
-        if self.action != "create":
-            queryset.select_related("likes", "comments").prefetch_related(
-                "hashtags"
+        if self.action == "retrieve":
+            preview_size = settings.NESTED_PREVIEW_SIZE
+            # Sliced prefetches load a bounded preview of viral posts
+            queryset = queryset.select_related("created_by").prefetch_related(
+                "hashtags",
+                Prefetch(
+                    "likes",
+                    queryset=Like.objects.only(
+                        "id", "post_id", "created_by_id", "created_at"
+                    ).order_by("-created_at", "-id")[:preview_size],
+                    to_attr="preview_likes",
+                ),
+                Prefetch(
+                    "comments",
+                    queryset=Comment.objects.select_related("created_by")
+                    .only("id", "post_id", "content", "created_by__email")
+                    .order_by("path")[:preview_size],
+                    to_attr="preview_comments",
+                ),
+            )
+        elif self.action != "create":
+            queryset = queryset.select_related("created_by").prefetch_related(
+                Prefetch("hashtags", queryset=HashTag.objects.only("id"))
             )
 
-        queryset = self.filter_queryset(queryset)
         return queryset
 
     def filter_queryset(self, queryset):
@@ -97,31 +520,156 @@ class PostViewSet(CoreModelMixin, viewsets.ModelViewSet):
                 )
 
         hashtags = self.request.query_params.get("hashtags")
+        tags = self.request.query_params.get("tags")
+        tag_mode = self.request.query_params.get("tag_mode", "all")
         title = self.request.query_params.get("title")
+        query = self.request.query_params.get("q")
         profile = self.request.query_params.get("profile")
         liked = self.request.query_params.get("liked")
 
         if hashtags:
-            hashtags_ids = [int(str_id) for str_id in hashtags.split(",")]
-            queryset = queryset.filter(hashtags__id__in=hashtags_ids)
+            try:
+                hashtags_ids = [int(str_id) for str_id in hashtags.split(",")]
+            except ValueError:
+                raise ValidationError({"hashtags": "Expected hashtag ids."})
+
+            queryset = queryset.filter(
+                self.has_hashtags(hashtag_id__in=hashtags_ids)
+            )
+
+        if tags:
+            names = {
+                normalize_hashtag(name) for name in tags.split(",") if name
+            }
+
+            if tag_mode == "any":
+                queryset = queryset.filter(
+                    self.has_hashtags(hashtag__name__in=names)
+                )
+            elif tag_mode == "all":
+                for name in names:
+                    queryset = queryset.filter(
+                        self.has_hashtags(hashtag__name=name)
+                    )
+            else:
+                raise ValidationError(
+                    {"tag_mode": "Expected one of: all, any."}
+                )
 
         if title:
             queryset = queryset.filter(title__icontains=title)
 
+        if query:
+            if self.is_cursor_paginated():
+                raise ValidationError(
+                    {
+                        "pagination": "Search results are ordered by "
+                        "relevance and have no cursor pagination."
+                    }
+                )
+
+            queryset = search.search(queryset, query).order_by(
+                "-search_rank", "-created_at"
+            )
+
         if profile:
             queryset = queryset.filter(profile=profile)
 
-        if liked:
-            queryset = queryset.filter(likes__created_by=self.request.user)
+        user = self.request.user
 
-        queryset = queryset.filter(
-            Q(is_visible=True) | Q(created_by=self.request.user)
+        if liked and user.is_authenticated:
+            queryset = self.filter_liked(queryset, user)
+
+        return queryset.filter(Post.get_visibility_filter(user))
+
+    @staticmethod
+    def has_hashtags(**lookups):
+        """
+        EXISTS over the post hashtags, which unlike a join never returns
+        a post twice
+        """
+        return Exists(
+            Post.hashtags.through.objects.filter(
+                post_id=OuterRef("pk"), **lookups
+            )
         )
 
-        return queryset
+    @staticmethod
+    def filter_liked(queryset, user):
+        """Filter posts liked by the user, including buffered likes"""
+        added_ids, removed_ids = likes.get_user_pending(user.id)
+
+        if not added_ids and not removed_ids:
+            return queryset.filter(likes__created_by=user)
+
+        liked = Like.objects.filter(post=OuterRef("pk"), created_by=user)
+
+        return queryset.filter(Q(Exists(liked)) | Q(pk__in=added_ids)).exclude(
+            pk__in=removed_ids
+        )
+
+    def get_serializer(self, *args, **kwargs):
+        if args and self.action in ("list", "retrieve", "feed"):
+            posts = args[0] if kwargs.get("many") else [args[0]]
+            context = kwargs["context"] = self.get_serializer_context()
+            context["pending_likes_counts"] = likes.get_pending_counts(
+                post.id for post in posts
+            )
+
+            if self.action == "retrieve":
+                post = posts[0]
+                context["pending_likes"] = {
+                    post.id: likes.get_pending_preview(
+                        post.id,
+                        [like.created_by_id for like in post.preview_likes],
+                        settings.NESTED_PREVIEW_SIZE,
+                    )
+                }
+
+        return super().get_serializer(*args, **kwargs)
+
+    def get_cache_scope(self):
+        # Only likes filters and authors of hidden posts, which are listed
+        # to them alone, see responses differing from the public ones
+        user = self.request.user
+
+        if user.is_authenticated and (
+            "liked" in self.request.query_params
+            or Post.objects.filter(
+                is_visible=False, created_by_id=user.id
+            ).exists()
+        ):
+            return f"user:{user.pk}"
+
+        return "public"
+
+    def get_viewer_fields(self, items):
+        """Whether the user liked and owns each post"""
+        user = self.request.user
+        post_ids = [item["id"] for item in items]
+        liked_ids = set()
+
+        if user.is_authenticated and post_ids:
+            added_ids, removed_ids = likes.get_user_pending(user.id)
+            liked_ids = (
+                set(
+                    Like.objects.filter(
+                        created_by_id=user.id, post_id__in=post_ids
+                    ).values_list("post_id", flat=True)
+                )
+                | added_ids
+            ) - removed_ids
+
+        return {
+            item["id"]: {
+                "is_liked": item["id"] in liked_ids,
+                "is_owner": item["created_by"]["id"] == user.id,
+            }
+            for item in items
+        }
 
     def get_serializer_class(self):
-        if self.action == "list":
+        if self.action in ("list", "feed"):
             return PostListSerializer
 
         if self.action == "retrieve":
@@ -132,11 +680,16 @@ class PostViewSet(CoreModelMixin, viewsets.ModelViewSet):
 
         return PostSerializer
 
+    @transaction.atomic
     def perform_create(self, serializer, *args, **kwargs):
         user_profile = UserProfile.objects.get(
             created_by_id=self.request.user.pk
         )
         post = super().perform_create(serializer, profile=user_profile)
+        search.update_index([post.id])
+        UserProfile.objects.filter(pk=user_profile.pk).update(
+            posts_count=F("posts_count") + 1, updated_at=Now()
+        )
 
         scheduled_time = post.scheduled_time
 
@@ -152,9 +705,28 @@ class PostViewSet(CoreModelMixin, viewsets.ModelViewSet):
                     "Scheduled time is not applicable if post is visible."
                 )
 
-            post_schedule_create.apply_async(
-                args=[post.id], eta=scheduled_time
-            )
+            # Published by the periodic post_publish_scheduled sweep
+
+        if post.is_visible:
+            transaction.on_commit(lambda: post_fan_out.delay(post.id))
+
+    def perform_update(self, serializer):
+        was_visible = serializer.instance.is_visible
+        super().perform_update(serializer)
+        post = serializer.instance
+        search.update_index([post.id])
+
+        if post.is_visible and not was_visible:
+            transaction.on_commit(lambda: post_fan_out.delay(post.id))
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        post_id = instance.id
+        super().perform_destroy(instance)
+        search.update_index([post_id])
+        UserProfile.objects.filter(pk=instance.profile_id).update(
+            posts_count=F("posts_count") - 1, updated_at=Now()
+        )
 
     @action(
         methods=["POST"],
@@ -172,9 +744,60 @@ class PostViewSet(CoreModelMixin, viewsets.ModelViewSet):
 
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        self.invalidate_cache()
 
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    @extend_schema(responses=LikeSerializer(many=True))
+    @action(
+        methods=["GET"],
+        detail=True,
+        url_path="likes",
+        url_name="likes",
+        pagination_class=CreatedAtCursorPagination,
+    )
+    def post_likes(self, request, pk=None):
+        """Endpoint for the likes of a post, latest first"""
+        post = self.get_object()
+        queryset = Like.objects.filter(post=post).select_related("created_by")
+        page = self.paginate_queryset(queryset)
+        serializer = LikeSerializer(page, many=True)
+
+        return self.get_paginated_response(serializer.data)
+
+    @extend_schema(responses=CommentSerializer(many=True))
+    @action(
+        methods=["GET"],
+        detail=True,
+        url_path="comments",
+        url_name="comments",
+        pagination_class=CommentThreadPagination,
+    )
+    def post_comments(self, request, pk=None):
+        """Endpoint for the comments of a post in thread order"""
+        post = self.get_object()
+        queryset = Comment.objects.filter(post=post).select_related(
+            "created_by"
+        )
+        page = self.paginate_queryset(queryset)
+        serializer = CommentSerializer(page, many=True)
+
+        return self.get_paginated_response(serializer.data)
+
+    @action(
+        methods=["GET"],
+        detail=False,
+        pagination_class=FeedPagination,
+        permission_classes=[IsAuthenticated],
+    )
+    def feed(self, request):
+        """Endpoint for posts of the users followed by the current user"""
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+
+        return self.get_paginated_response(serializer.data)
+
     @extend_schema(
         parameters=[
             OpenApiParameter(
@@ -204,6 +827,15 @@ class PostViewSet(CoreModelMixin, viewsets.ModelViewSet):
                 description="Filter by title (ex. ?title=Develop)",
                 type=OpenApiTypes.STR,
             ),
+            OpenApiParameter(
+                name="q",
+                description=(
+                    "Full-text search in title, content and hashtags, "
+                    "ordered by relevance and paginated by page number "
+                    "(ex. ?q=django tips)"
+                ),
+                type=OpenApiTypes.STR,
+            ),
             OpenApiParameter(
                 name="profile",
                 description="Filter by profile id (ex. ?profile=2)",
@@ -214,11 +846,34 @@ class PostViewSet(CoreModelMixin, viewsets.ModelViewSet):
                 description="Filter by hashtag ids (ex. ?hashtags=1,2)",
                 type={"type": "list", "items": {"type": "number"}},
             ),
+            OpenApiParameter(
+                name="tags",
+                description="Filter by hashtag names (ex. ?tags=python,news)",
+                type={"type": "list", "items": {"type": "string"}},
+            ),
+            OpenApiParameter(
+                name="tag_mode",
+                description=(
+                    "Match posts with all or any of the tags "
+                    "(ex. ?tag_mode=any), all by default"
+                ),
+                type=OpenApiTypes.STR,
+                enum=["all", "any"],
+            ),
             OpenApiParameter(
                 name="liked",
                 description="Filter liked posts (ex. ?liked=True)",
                 type=OpenApiTypes.BOOL,
             ),
+            OpenApiParameter(
+                name="pagination",
+                description=(
+                    "Paginate by creation time with a cursor "
+                    "(ex. ?pagination=cursor)"
+                ),
+                type=OpenApiTypes.STR,
+                enum=["cursor"],
+            ),
         ],
     )
     def list(self, request, *args, **kwargs):
@@ -144,7 +144,7 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "user.authentication.JWTClaimsAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
@@ -175,8 +175,29 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
     "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": True,
+    "TOKEN_OBTAIN_SERIALIZER": "user.serializers.TokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "user.serializers.TokenRefreshSerializer",
+    "TOKEN_VERIFY_SERIALIZER": "user.serializers.TokenVerifySerializer",
 }
 
+# Authors with at least this many followers are not fanned out on write,
+# their posts are merged into the feeds of followers on read instead
+FEED_FANOUT_FOLLOWER_LIMIT = int(
+    os.environ.get("FEED_FANOUT_FOLLOWER_LIMIT", 10000)
+)
+FEED_BACKFILL_SIZE = int(os.environ.get("FEED_BACKFILL_SIZE", 100))
+
+# Hashtag usage is counted in Redis sorted sets per time bucket, trending
+# sums the recent buckets with weights decaying by bucket age
+HASHTAG_TRENDING_BUCKET_SECONDS = int(
+    os.environ.get("HASHTAG_TRENDING_BUCKET_SECONDS", 60 * 60)
+)
+HASHTAG_TRENDING_BUCKETS = int(os.environ.get("HASHTAG_TRENDING_BUCKETS", 24))
+HASHTAG_TRENDING_DECAY = float(os.environ.get("HASHTAG_TRENDING_DECAY", 0.8))
+HASHTAG_TRENDING_CACHE_SECONDS = int(
+    os.environ.get("HASHTAG_TRENDING_CACHE_SECONDS", 60)
+)
+
 CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = True
 CELERY_TIMEZONE = "Europe/Kyiv"
 CELERY_TASK_TRACK_STARTED = True
@@ -185,3 +206,86 @@ CELERY_BROKER_URL = os.environ.get("CELERY_BROKER", "redis://localhost:6379/0")
 CELERY_RESULT_BACKEND = os.environ.get(
     "CELERY_BACKEND", "redis://localhost:6379/0"
 )
+
+CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
+CELERY_BEAT_SCHEDULE = {}
+
+REDIS_URL = os.environ.get("REDIS_URL", CELERY_BROKER_URL)
+
+# Redis URL of the response cache; the local-memory cache is used when
+# unset, so tests and plain dev runs need no Redis server
+CACHE_URL = os.environ.get("CACHE_URL")
+
+if CACHE_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Seconds a cached list or detail response may be served, writes through
+# the API drop it earlier by bumping the version. Likes, comments and
+# follows only drop the details of their object, so the counters of
+# cached lists may lag behind by up to this timeout
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get("RESPONSE_CACHE_TIMEOUT", 60))
+
+# Detail responses embed only this many likes, comments and posts, the
+# rest is paged through their own endpoints
+NESTED_PREVIEW_SIZE = int(os.environ.get("NESTED_PREVIEW_SIZE", 10))
+
+# Likes are buffered in Redis and written in bulk by a periodic task,
+# which takes the row contention off hot posts during spikes
+LIKE_WRITE_BEHIND = bool(int(os.environ.get("LIKE_WRITE_BEHIND", 0)))
+LIKE_FLUSH_SECONDS = float(os.environ.get("LIKE_FLUSH_SECONDS", 5))
+LIKE_FLUSH_BATCH_SIZE = int(os.environ.get("LIKE_FLUSH_BATCH_SIZE", 1000))
+
+# Scheduled even with the buffer off, so that leftovers are written
+CELERY_BEAT_SCHEDULE["like-buffer-flush"] = {
+    "task": "post.tasks.like_buffer_flush",
+    "schedule": LIKE_FLUSH_SECONDS,
+    "kwargs": {"batch_size": LIKE_FLUSH_BATCH_SIZE},
+}
+
+# Scheduled posts are published by a periodic sweep instead of one
+# ETA task per post held in worker memory
+POST_PUBLISH_SECONDS = float(os.environ.get("POST_PUBLISH_SECONDS", 30))
+
+CELERY_BEAT_SCHEDULE["post-publish-scheduled"] = {
+    "task": "post.tasks.post_publish_scheduled",
+    "schedule": POST_PUBLISH_SECONDS,
+}
+
+# Expired JWTs are deleted from the blacklist tables in batches of
+# TOKEN_PRUNE_BATCH_SIZE rows
+TOKEN_PRUNE_SECONDS = float(os.environ.get("TOKEN_PRUNE_SECONDS", 60 * 60))
+TOKEN_PRUNE_BATCH_SIZE = int(os.environ.get("TOKEN_PRUNE_BATCH_SIZE", 1000))
+
+CELERY_BEAT_SCHEDULE["token-prune-expired"] = {
+    "task": "user.tasks.token_prune_expired",
+    "schedule": TOKEN_PRUNE_SECONDS,
+    "kwargs": {"batch_size": TOKEN_PRUNE_BATCH_SIZE},
+}
+
+# Seconds the claims of users authenticating with tokens issued without
+# them are cached, newer access tokens carry the claims themselves
+AUTH_USER_CACHE_SECONDS = int(os.environ.get("AUTH_USER_CACHE_SECONDS", 60))
+
+# Redis is trusted to hold every blacklisted JWT for this many seconds
+# after the keys are rebuilt. Rebuilds run twice as often, so keys lost
+# by a failed write or a restored snapshot are not trusted for longer.
+TOKEN_BLACKLIST_WARM_SECONDS = int(
+    os.environ.get("TOKEN_BLACKLIST_WARM_SECONDS", 10 * 60)
+)
+
+CELERY_BEAT_SCHEDULE["token-blacklist-warm"] = {
+    "task": "user.tasks.token_blacklist_warm",
+    "schedule": TOKEN_BLACKLIST_WARM_SECONDS / 2,
+    "kwargs": {"batch_size": TOKEN_PRUNE_BATCH_SIZE},
+}
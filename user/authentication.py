@@ -0,0 +1,82 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed,
+    InvalidToken,
+)
+from rest_framework_simplejwt.settings import api_settings
+
+# User fields signed into access tokens, enough for the permission checks
+USER_CLAIMS = ("is_staff", "is_active")
+
+
+def get_cache_key(user_id):
+    return f"auth_user:{user_id}"
+
+
+def get_user_claims(user_id, cached=True):
+    """Return the claims of a user, None when the user does not exist"""
+    key = get_cache_key(user_id)
+    claims = cache.get(key) if cached else None
+
+    if claims is None:
+        claims = (
+            get_user_model()
+            .objects.filter(**{api_settings.USER_ID_FIELD: user_id})
+            .values(*USER_CLAIMS)
+            .first()
+        )
+
+        if claims is not None:
+            cache.set(key, claims, settings.AUTH_USER_CACHE_SECONDS)
+
+    return claims
+
+
+def set_user_claims(token, claims):
+    for name in USER_CLAIMS:
+        token[name] = claims[name]
+
+
+class JWTClaimsAuthentication(JWTAuthentication):
+    """
+    Authenticate with an access token without loading the user row. The
+    user is built from the signed claims of the token, or of a cached
+    lookup for tokens issued without them, so only its id, is_staff and
+    is_active are set. Views needing other fields load the user.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            )
+
+        if all(name in validated_token for name in USER_CLAIMS):
+            claims = {name: validated_token[name] for name in USER_CLAIMS}
+        else:
+            claims = get_user_claims(user_id)
+
+        if claims is None:
+            raise AuthenticationFailed(
+                _("User not found"), code="user_not_found"
+            )
+
+        if not claims["is_active"]:
+            raise AuthenticationFailed(
+                _("User is inactive"), code="user_inactive"
+            )
+
+        return self.user_model(
+            **{api_settings.USER_ID_FIELD: user_id}, **claims
+        )
+
+
+class JWTClaimsScheme(SimpleJWTScheme):
+    target_class = JWTClaimsAuthentication
@@ -0,0 +1,114 @@
+"""
+Redis layer in front of the blacklist tables of SimpleJWT. Blacklisted
+JTIs are kept as keys expiring with their token, and a warm marker
+tells that every blacklisted JTI of the database is in Redis, so that
+lookups of tokens which are not blacklisted never reach the database.
+The tables stay the source of truth. The marker expires unless the keys
+are rebuilt, so keys lost by a failed write or a restored snapshot are
+not trusted longer than TOKEN_BLACKLIST_WARM_SECONDS, and lookups fall
+back to the tables while it is missing or Redis fails.
+"""
+
+import logging
+import math
+
+from django.conf import settings
+from django.utils import timezone
+from redis import RedisError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from api.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+WARM_KEY = "token_blacklist:warm"
+
+
+def get_key(jti):
+    return f"token_blacklist:jti:{jti}"
+
+
+def get_ttl(expires_at, now=None):
+    """Seconds left until expires_at, a datetime or a timestamp"""
+    now = now or timezone.now()
+
+    if not isinstance(expires_at, (int, float)):
+        expires_at = expires_at.timestamp()
+
+    return math.ceil(expires_at - now.timestamp())
+
+
+def add(tokens):
+    """
+    Cache (jti, expires_at) pairs of tokens blacklisted in the database.
+    When the write fails the warm marker is dropped, so that lookups go
+    to the database until the keys are rebuilt.
+    """
+    now = timezone.now()
+    pipeline = get_redis().pipeline(transaction=False)
+
+    for jti, expires_at in tokens:
+        ttl = get_ttl(expires_at, now)
+
+        if ttl > 0:
+            pipeline.set(get_key(jti), 1, ex=ttl)
+
+    try:
+        pipeline.execute()
+    except RedisError:
+        logger.warning("Blacklisted tokens not cached", exc_info=True)
+
+        try:
+            get_redis().delete(WARM_KEY)
+        except RedisError:
+            pass
+
+
+def is_blacklisted(jti):
+    """Return whether the token is blacklisted, from Redis when warm"""
+    pipeline = get_redis().pipeline(transaction=False)
+    pipeline.exists(get_key(jti))
+    pipeline.exists(WARM_KEY)
+
+    try:
+        cached, warm = pipeline.execute()
+    except RedisError:
+        logger.warning("Token blacklist cache not available", exc_info=True)
+        cached, warm = False, False
+
+    if cached:
+        return True
+
+    if warm:
+        return False
+
+    return BlacklistedToken.objects.filter(token__jti=jti).exists()
+
+
+def warm(batch_size=1000):
+    """Copy the unexpired blacklisted tokens into Redis, return their count"""
+    tokens = (
+        BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now())
+        .values_list("token__jti", "token__expires_at")
+        .iterator(chunk_size=batch_size)
+    )
+    now = timezone.now()
+    redis = get_redis()
+    pipeline = redis.pipeline(transaction=False)
+    count = 0
+
+    for jti, expires_at in tokens:
+        ttl = get_ttl(expires_at, now)
+
+        if ttl > 0:
+            pipeline.set(get_key(jti), 1, ex=ttl)
+            count += 1
+
+        if len(pipeline) >= batch_size:
+            pipeline.execute()
+
+    pipeline.execute()
+    # Tokens blacklisted meanwhile cache their own keys after the insert
+    redis.set(WARM_KEY, 1, ex=settings.TOKEN_BLACKLIST_WARM_SECONDS)
+
+    return count
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:52
+
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db import migrations
+from django.db.models.functions import Upper
+
+from api.operations import PostgresAddIndex, PostgresTrigramExtension
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("user", "0002_user_username"),
+    ]
+
+    operations = [
+        PostgresTrigramExtension(),
+    ] + [
+        # Match the UPPER(...) LIKE UPPER(...) of icontains lookups
+        PostgresAddIndex(
+            model_name="user",
+            index=GinIndex(
+                OpClass(Upper(field), name="gin_trgm_ops"),
+                name=f"user_{field}_trgm_idx",
+            ),
+        )
+        for field in ("email", "first_name", "last_name", "username")
+    ]
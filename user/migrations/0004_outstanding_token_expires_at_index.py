@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:40
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("user", "0003_user_trigram_indexes"),
+        ("token_blacklist", "0012_alter_outstandingtoken_user"),
+    ]
+
+    operations = [
+        # Expired tokens are pruned in expires_at order, the table belongs
+        # to simplejwt, so its index is created with SQL
+        migrations.RunSQL(
+            "CREATE INDEX outstanding_token_expires_at_idx "
+            "ON token_blacklist_outstandingtoken (expires_at)",
+            "DROP INDEX outstanding_token_expires_at_idx",
+        ),
+    ]
@@ -1,5 +1,17 @@
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt import serializers as jwt_serializers
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, UntypedToken
+
+from user import blacklist
+from user.authentication import (
+    USER_CLAIMS,
+    get_user_claims,
+    set_user_claims,
+)
+from user.tokens import RefreshToken
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -51,3 +63,63 @@ class CoreModelSerializer(serializers.Serializer):
             "updated_at",
             "created_by",
         )
+
+
+class TokenObtainPairSerializer(jwt_serializers.TokenObtainPairSerializer):
+    token_class = RefreshToken
+
+    @classmethod
+    def get_token(cls, user):
+        """Sign the claims authenticating requests without a user query"""
+        token = super().get_token(user)
+        set_user_claims(
+            token, {name: getattr(user, name) for name in USER_CLAIMS}
+        )
+
+        return token
+
+
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    token_class = RefreshToken
+
+    def validate(self, attrs):
+        """
+        Re-sign the user claims from the database, so that access tokens
+        never carry claims older than their own lifetime, and record the
+        rotated refresh token as outstanding
+        """
+        data = super().validate(attrs)
+        access = AccessToken(data["access"], verify=False)
+        claims = get_user_claims(
+            access[api_settings.USER_ID_CLAIM], cached=False
+        )
+
+        if claims is None or not claims["is_active"]:
+            raise AuthenticationFailed(
+                "No active account found for the token", code="user_inactive"
+            )
+
+        set_user_claims(access, claims)
+        data["access"] = str(access)
+
+        if "refresh" in data:
+            refresh = self.token_class(data["refresh"], verify=False)
+            set_user_claims(refresh, claims)
+            refresh.outstand()
+            data["refresh"] = str(refresh)
+
+        return data
+
+
+class TokenVerifySerializer(serializers.Serializer):
+    token = serializers.CharField(write_only=True)
+
+    def validate(self, attrs):
+        """Verify the token, looking its JTI up in the Redis blacklist"""
+        token = UntypedToken(attrs["token"])
+        jti = token.get(api_settings.JTI_CLAIM)
+
+        if jti and blacklist.is_blacklisted(jti):
+            raise serializers.ValidationError("Token is blacklisted")
+
+        return {}
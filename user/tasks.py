@@ -0,0 +1,73 @@
+from celery import shared_task
+from celery.utils.log import get_task_logger
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+from redis import RedisError
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+
+from user import blacklist
+
+logger = get_task_logger(__name__)
+
+
+@shared_task
+def token_prune_expired(batch_size=1000):
+    """
+    Delete expired outstanding tokens and their blacklist entries in
+    batches, each in its own short transaction
+    """
+    now = timezone.now()
+    expired = OutstandingToken.objects.filter(expires_at__lte=now)
+    oldest = expired.aggregate(oldest=Min("expires_at"))["oldest"]
+    pruned = {}
+
+    while True:
+        with transaction.atomic():
+            token_ids = list(
+                expired.order_by("expires_at").values_list("id", flat=True)[
+                    :batch_size
+                ]
+            )
+
+            if not token_ids:
+                break
+
+            # Blacklist entries of the batch are cascaded in one query
+            _, deleted = OutstandingToken.objects.filter(
+                pk__in=token_ids
+            ).delete()
+
+        for label, count in deleted.items():
+            pruned[label] = pruned.get(label, 0) + count
+
+    outstanding = pruned.get(OutstandingToken._meta.label, 0)
+    blacklisted = pruned.get(BlacklistedToken._meta.label, 0)
+    lag = (now - oldest).total_seconds() if oldest else 0
+
+    logger.info(
+        f"{outstanding} outstanding and {blacklisted} blacklisted tokens "
+        f"pruned, oldest expired {lag:.0f}s ago"
+    )
+
+    return outstanding
+
+
+@shared_task
+def token_blacklist_warm(batch_size=1000):
+    """
+    Rebuild the Redis cache of blacklisted tokens and renew its marker,
+    which also restores the keys of failed writes
+    """
+    try:
+        cached = blacklist.warm(batch_size)
+    except RedisError:
+        logger.warning("Blacklisted tokens not cached", exc_info=True)
+        return 0
+
+    logger.info(f"{cached} blacklisted tokens cached")
+
+    return cached
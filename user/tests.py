@@ -0,0 +1,165 @@
+from unittest import mock
+
+import fakeredis
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase
+from redis import RedisError
+from rest_framework.test import APIClient
+from rest_framework_simplejwt import tokens
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+from user import blacklist
+from user.authentication import JWTClaimsAuthentication
+from user.models import User
+from user.serializers import TokenObtainPairSerializer
+from user.tokens import RefreshToken
+
+REFRESH_URL = "/api/user/token/refresh/"
+
+
+class TokenBlacklistTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="user@test.com", password="pass"
+        )
+
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis(decode_responses=True)
+        patcher = mock.patch(
+            "user.blacklist.get_redis", return_value=self.redis
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+        self.token = RefreshToken.for_user(self.user)
+        self.jti = self.token["jti"]
+
+    def refresh(self):
+        return self.client.post(REFRESH_URL, {"refresh": str(self.token)})
+
+    def test_warm_lookups_skip_the_database(self):
+        blacklist.warm()
+
+        self.assertLessEqual(
+            self.redis.ttl(blacklist.WARM_KEY),
+            settings.TOKEN_BLACKLIST_WARM_SECONDS,
+        )
+
+        with self.assertNumQueries(0):
+            self.assertFalse(blacklist.is_blacklisted(self.jti))
+
+        self.redis.delete(blacklist.WARM_KEY)
+
+        with self.assertNumQueries(1):
+            self.assertFalse(blacklist.is_blacklisted(self.jti))
+
+    def test_revoked_after_marker_expired(self):
+        blacklist.warm()
+        self.client.force_authenticate(self.user)
+        response = self.client.post(
+            "/api/user/logout/", {"refresh_token": str(self.token)}
+        )
+        self.assertEqual(response.status_code, 205)
+
+        with self.assertNumQueries(0):
+            self.assertTrue(blacklist.is_blacklisted(self.jti))
+
+        # The marker expired and the key was lost with it
+        self.redis.flushall()
+
+        self.assertEqual(self.refresh().status_code, 401)
+
+        blacklist.warm()
+
+        with self.assertNumQueries(0):
+            self.assertTrue(blacklist.is_blacklisted(self.jti))
+
+    def test_failed_write_drops_the_marker(self):
+        blacklist.warm()
+
+        with mock.patch.object(self.redis, "pipeline") as pipeline:
+            pipeline.return_value.execute.side_effect = RedisError
+
+            with self.assertLogs("user.blacklist", "WARNING"):
+                self.token.blacklist()
+
+        self.assertFalse(self.redis.exists(blacklist.WARM_KEY))
+        self.assertTrue(blacklist.is_blacklisted(self.jti))
+        self.assertEqual(self.refresh().status_code, 401)
+
+
+class JWTClaimsAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email="user@test.com", password="pass"
+        )
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch(
+            "user.blacklist.get_redis",
+            return_value=fakeredis.FakeRedis(decode_responses=True),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.authentication = JWTClaimsAuthentication()
+
+    def get_user(self, access):
+        return self.authentication.get_user(
+            self.authentication.get_validated_token(str(access))
+        )
+
+    def test_user_from_claims(self):
+        access = TokenObtainPairSerializer.get_token(self.user).access_token
+
+        with self.assertNumQueries(0):
+            user = self.get_user(access)
+
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertTrue(user.is_active)
+        self.assertFalse(user.is_staff)
+        self.assertTrue(user._state.adding)
+
+    def test_token_without_claims(self):
+        access = tokens.RefreshToken.for_user(self.user).access_token
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get_user(access).pk, self.user.pk)
+
+        with self.assertNumQueries(0):
+            self.get_user(access)
+
+    def test_inactive_claim(self):
+        self.user.is_active = False
+        access = TokenObtainPairSerializer.get_token(self.user).access_token
+
+        self.assertFalse(access["is_active"])
+
+        with self.assertRaises(AuthenticationFailed):
+            self.get_user(access)
+
+    def test_refresh_signs_current_claims(self):
+        refresh = TokenObtainPairSerializer.get_token(self.user)
+        User.objects.filter(pk=self.user.pk).update(is_staff=True)
+
+        response = APIClient().post(REFRESH_URL, {"refresh": str(refresh)})
+        self.assertEqual(response.status_code, 200)
+
+        access = tokens.AccessToken(response.data["access"])
+        rotated = RefreshToken(response.data["refresh"])
+        self.assertTrue(access["is_staff"])
+        self.assertTrue(rotated["is_staff"])
+        self.assertTrue(
+            OutstandingToken.objects.filter(jti=rotated["jti"]).exists()
+        )
+
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+
+        response = APIClient().post(
+            REFRESH_URL, {"refresh": response.data["refresh"]}
+        )
+        self.assertEqual(response.status_code, 401)
@@ -0,0 +1,37 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt import tokens
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from user import blacklist
+
+
+class RefreshToken(tokens.RefreshToken):
+    """Refresh token checking and writing through the Redis blacklist"""
+
+    def check_blacklist(self):
+        if blacklist.is_blacklisted(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        result = super().blacklist()
+        blacklist.add(
+            [(self.payload[api_settings.JTI_CLAIM], self.payload["exp"])]
+        )
+
+        return result
+
+    def outstand(self):
+        """
+        Record a token issued by rotation as outstanding, as for_user does
+        for new ones, so that logging out everywhere blacklists it too
+        """
+        return OutstandingToken.objects.create(
+            user_id=self[api_settings.USER_ID_CLAIM],
+            jti=self[api_settings.JTI_CLAIM],
+            token=str(self),
+            created_at=self.current_time,
+            expires_at=datetime_from_epoch(self["exp"]),
+        )
@@ -1,3 +1,4 @@
+from django.db import transaction
 from rest_framework import generics, views, status
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
@@ -6,9 +7,11 @@ from rest_framework_simplejwt.token_blacklist.models import (
     OutstandingToken,
     BlacklistedToken,
 )
-from rest_framework_simplejwt.tokens import RefreshToken
 
+from api.cache import CacheInvalidationMixin
+from user import blacklist
 from user.serializers import UserSerializer, UserDetailSerializer
+from user.tokens import RefreshToken
 
 
 class CreateUserView(generics.CreateAPIView):
@@ -16,9 +19,10 @@ class CreateUserView(generics.CreateAPIView):
     permission_classes = (AllowAny,)
 
 
-class ManageUserView(generics.RetrieveUpdateAPIView):
+class ManageUserView(CacheInvalidationMixin, generics.RetrieveUpdateAPIView):
     serializer_class = UserDetailSerializer
     authentication_classes = (JWTAuthentication,)
+    invalidated_namespaces = ("post", "user_profile")
 
     def get_object(self):
         return self.request.user
@@ -37,14 +41,24 @@ class LogoutView(views.APIView):
 
 
 class LogoutAllView(views.APIView):
+    @transaction.atomic
     def post(self, request):
-        tokens = OutstandingToken.objects.filter(user_id=request.user.id)
-        for token in tokens:
-            t, _ = BlacklistedToken.objects.get_or_create(token=token)
+        """Blacklist every outstanding token of the user in one insert"""
+        tokens = OutstandingToken.objects.filter(
+            user_id=request.user.id, blacklistedtoken__isnull=True
+        ).values_list("id", "jti", "expires_at")
+        # Conflicts are tokens blacklisted by a concurrent request
+        BlacklistedToken.objects.bulk_create(
+            [BlacklistedToken(token_id=token_id) for token_id, _, _ in tokens],
+            ignore_conflicts=True,
+        )
+        blacklist.add((jti, expires_at) for _, jti, expires_at in tokens)
 
         return Response(status=status.HTTP_205_RESET_CONTENT)
 
 
 class CoreModelMixin:
     def perform_create(self, serializer, *args, **kwargs):
-        return serializer.save(created_by=self.request.user, *args, **kwargs)
+        return serializer.save(
+            created_by_id=self.request.user.id, *args, **kwargs
+        )
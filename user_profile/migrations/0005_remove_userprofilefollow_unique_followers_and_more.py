@@ -33,7 +33,7 @@ class Migration(migrations.Migration):
             model_name="userprofilefollow",
             name="created_by",
             field=models.ForeignKey(
-                default=datetime.date.today,
+                default=1,
                 editable=False,
                 on_delete=django.db.models.deletion.CASCADE,
                 related_name="%(class)s",
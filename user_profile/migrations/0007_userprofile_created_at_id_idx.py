@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("user_profile", "0006_alter_userprofilefollow_created_by"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="userprofile",
+            index=models.Index(
+                fields=["created_at", "id"], name="profile_created_at_id_idx"
+            ),
+        ),
+    ]
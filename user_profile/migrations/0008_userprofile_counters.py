@@ -0,0 +1,60 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:29
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_rows(model, field, outer_field):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef(outer_field)})
+            .order_by()
+            .values(field)
+            .annotate(count=Count("pk"))
+            .values("count")
+        ),
+        0,
+    )
+
+
+def fill_counters(apps, schema_editor):
+    UserProfile = apps.get_model("user_profile", "UserProfile")
+    UserProfileFollow = apps.get_model("user_profile", "UserProfileFollow")
+    Post = apps.get_model("post", "Post")
+
+    UserProfile.objects.update(
+        followers_count=count_rows(
+            UserProfileFollow, "following", "created_by"
+        ),
+        followings_count=count_rows(
+            UserProfileFollow, "created_by", "created_by"
+        ),
+        posts_count=count_rows(Post, "profile", "pk"),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("user_profile", "0007_userprofile_created_at_id_idx"),
+        ("post", "0006_post_likes_count_and_comments_count"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userprofile",
+            name="followers_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="userprofile",
+            name="followings_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="userprofile",
+            name="posts_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
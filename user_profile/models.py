@@ -22,6 +22,9 @@ class UserProfile(CoreModel):
     image = models.ImageField(
         blank=True, null=True, upload_to=get_image_file_path
     )
+    followers_count = models.PositiveIntegerField(default=0, editable=False)
+    followings_count = models.PositiveIntegerField(default=0, editable=False)
+    posts_count = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         constraints = [
@@ -29,6 +32,11 @@ class UserProfile(CoreModel):
                 fields=["created_by"], name="unique_created_by"
             )
         ]
+        indexes = [
+            models.Index(
+                fields=["created_at", "id"], name="profile_created_at_id_idx"
+            )
+        ]
 
     def __str__(self):
         return f"{self.id}: {self.created_by}"
@@ -1,3 +1,4 @@
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
 from user.serializers import CoreModelSerializer
@@ -32,12 +33,28 @@ class UserProfileSerializer(CoreModelSerializer, serializers.ModelSerializer):
         ) + CoreModelSerializer.Meta.fields
 
     def get_followings(self, obj):
-        qs = UserProfileFollow.objects.filter(created_by=obj.created_by)
-        return [follow.following_id for follow in qs]
+        follow_ids = self.context.get("follow_ids")
+
+        if follow_ids is None:
+            return list(
+                UserProfileFollow.objects.filter(
+                    created_by_id=obj.created_by_id
+                ).values_list("following_id", flat=True)
+            )
+
+        return follow_ids["followings"].get(obj.created_by_id, [])
 
     def get_followers(self, obj):
-        qs = UserProfileFollow.objects.filter(following=obj.created_by)
-        return [follow.created_by_id for follow in qs]
+        follow_ids = self.context.get("follow_ids")
+
+        if follow_ids is None:
+            return list(
+                UserProfileFollow.objects.filter(
+                    following_id=obj.created_by_id
+                ).values_list("created_by_id", flat=True)
+            )
+
+        return follow_ids["followers"].get(obj.created_by_id, [])
 
 
 class UserProfileListSerializer(UserProfileSerializer):
@@ -58,8 +75,22 @@ class UserProfileListSerializer(UserProfileSerializer):
 
 
 class UserProfileDetailSerializer(UserProfileSerializer):
-    posts = serializers.StringRelatedField(many=True, read_only=True)
+    """
+    Profile with the preview of its latest posts prefetched by the view,
+    all of them are paged through /user_profiles/{id}/posts/
+    """
+
+    posts = serializers.SerializerMethodField()
+    posts_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = UserProfile
-        fields = UserProfileSerializer.Meta.fields + ("posts", "followings")
+        fields = UserProfileSerializer.Meta.fields + (
+            "posts",
+            "posts_count",
+            "followings",
+        )
+
+    @extend_schema_field(serializers.ListField(child=serializers.CharField()))
+    def get_posts(self, obj):
+        return [str(post) for post in obj.preview_posts]
@@ -0,0 +1,44 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from post.tests import create_posts, create_user
+from user_profile.models import UserProfileFollow
+
+
+class UserProfileViewSetQueryCountTests(TestCase):
+    """Query counts of profile reads must not grow with their relations"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [create_user(i) for i in range(4)]
+        create_posts(cls.users, 8)
+
+        for follower, _ in cls.users[1:]:
+            UserProfileFollow.objects.create(
+                created_by=follower, following=cls.users[0][0]
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.users[0][0])
+
+    def test_list(self):
+        # Validators, count and profiles
+        with self.assertNumQueries(3):
+            response = self.client.get("/api/user_profile/user_profiles/")
+
+        self.assertEqual(response.data["count"], 4)
+
+    def test_retrieve(self):
+        # Validators, profile, posts preview and follows
+        profile = self.users[0][1]
+
+        with self.assertNumQueries(4):
+            response = self.client.get(
+                f"/api/user_profile/user_profiles/{profile.id}/"
+            )
+
+        self.assertEqual(len(response.data["followers"]), 3)
+        self.assertEqual(len(response.data["posts"]), 2)
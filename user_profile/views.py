@@ -1,4 +1,9 @@
-from django.db.models import Count
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Prefetch, Q
+from django.db.models.functions import Now
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework import viewsets, status
@@ -7,7 +12,17 @@ from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
 
+from api.cache import (
+    CachedResponseMixin,
+    CacheInvalidationMixin,
+    bump_objects,
+)
+from api.pagination import CreatedAtCursorPagination, CursorPaginationMixin
 from api.permissions import IsOwnerOrReadOnly
+from post import likes
+from post.models import HashTag, Post
+from post.serializers import PostListSerializer
+from post.tasks import timeline_backfill, timeline_prune
 from user.views import CoreModelMixin
 from user_profile.models import UserProfile, UserProfileFollow
 from user_profile.serializers import (
@@ -24,25 +39,41 @@ class UserProfilePagination(PageNumberPagination):
     max_page_size = 100
 
 
-class UserProfileViewSet(CoreModelMixin, viewsets.ModelViewSet):
+class UserProfileViewSet(
+    CachedResponseMixin,
+    CacheInvalidationMixin,
+    CursorPaginationMixin,
+    CoreModelMixin,
+    viewsets.ModelViewSet,
+):
     queryset = UserProfile.objects.all()
     pagination_class = UserProfilePagination
+    cache_namespace = "user_profile"
+    invalidated_namespaces = ("user_profile",)
     permission_classes = [
         IsAuthenticatedOrReadOnly,
         IsOwnerOrReadOnly,
     ]
 
     def get_queryset(self):
-        queryset = self.queryset.annotate(
-            followers_count=(Count("created_by__followers")),
-            followings_count=(Count("created_by__followings")),
-            posts_count=(Count("posts")),
-        )
+        queryset = self.queryset
 
         if self.action != "create":
-            queryset.select_related(
-                "created_by__followers", "created_by__followings"
-            ).prefetch_related("posts")
+            queryset = queryset.select_related("created_by")
+
+        if self.action == "retrieve":
+            # Public preview, as the response is cached for every user
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    "posts",
+                    queryset=Post.objects.filter(is_visible=True)
+                    .only("id", "title", "profile_id", "created_at")
+                    .order_by("-created_at", "-id")[
+                        : settings.NESTED_PREVIEW_SIZE
+                    ],
+                    to_attr="preview_posts",
+                )
+            )
 
         queryset = self.filter_queryset(queryset)
         return queryset
@@ -74,6 +105,37 @@ class UserProfileViewSet(CoreModelMixin, viewsets.ModelViewSet):
 
         return UserProfileSerializer
 
+    def get_serializer(self, *args, **kwargs):
+        serializer_class = self.get_serializer_class()
+
+        if args and "followers" in serializer_class.Meta.fields:
+            profiles = args[0] if kwargs.get("many") else [args[0]]
+            kwargs.setdefault("context", self.get_serializer_context())
+            kwargs["context"]["follow_ids"] = self.get_follow_ids(profiles)
+
+        return super().get_serializer(*args, **kwargs)
+
+    @staticmethod
+    def get_follow_ids(profiles):
+        """Load follower and following ids of all profiles in one query"""
+        user_ids = {profile.created_by_id for profile in profiles}
+        follows = UserProfileFollow.objects.filter(
+            Q(created_by_id__in=user_ids) | Q(following_id__in=user_ids)
+        ).values_list("created_by_id", "following_id")
+
+        follow_ids = {
+            "followers": defaultdict(list),
+            "followings": defaultdict(list),
+        }
+
+        for created_by_id, following_id in follows:
+            if created_by_id in user_ids:
+                follow_ids["followings"][created_by_id].append(following_id)
+            if following_id in user_ids:
+                follow_ids["followers"][following_id].append(created_by_id)
+
+        return follow_ids
+
     @action(
         methods=["POST"],
         detail=True,
@@ -86,9 +148,37 @@ class UserProfileViewSet(CoreModelMixin, viewsets.ModelViewSet):
 
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        self.invalidate_cache()
 
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    @extend_schema(responses=PostListSerializer(many=True))
+    @action(
+        methods=["GET"],
+        detail=True,
+        pagination_class=CreatedAtCursorPagination,
+    )
+    def posts(self, request, pk=None):
+        """Endpoint for the posts of a user profile, latest first"""
+        profile = self.get_object()
+        queryset = (
+            Post.objects.defer("search_vector")
+            .filter(profile=profile)
+            .filter(Post.get_visibility_filter(request.user))
+            .select_related("created_by")
+            .prefetch_related(
+                Prefetch("hashtags", queryset=HashTag.objects.only("id"))
+            )
+        )
+        page = self.paginate_queryset(queryset)
+        context = self.get_serializer_context()
+        context["pending_likes_counts"] = likes.get_pending_counts(
+            post.id for post in page
+        )
+        serializer = PostListSerializer(page, many=True, context=context)
+
+        return self.get_paginated_response(serializer.data)
+
     @extend_schema(
         parameters=[
             OpenApiParameter(
@@ -118,6 +208,15 @@ class UserProfileViewSet(CoreModelMixin, viewsets.ModelViewSet):
                 description="Filter by user id (ex. ?created_by=2)",
                 type=OpenApiTypes.STR,
             ),
+            OpenApiParameter(
+                name="pagination",
+                description=(
+                    "Paginate by creation time with a cursor "
+                    "(ex. ?pagination=cursor)"
+                ),
+                type=OpenApiTypes.STR,
+                enum=["cursor"],
+            ),
         ],
     )
     def list(self, request, *args, **kwargs):
@@ -131,3 +230,70 @@ class UserProfileFollowViewSet(CoreModelMixin, viewsets.ModelViewSet):
         IsAuthenticatedOrReadOnly,
         IsOwnerOrReadOnly,
     ]
+
+    @staticmethod
+    def update_profile_counters(created_by_id, following_id, delta):
+        """Update the counters and drop the cached details of both users"""
+        UserProfile.objects.filter(created_by_id=created_by_id).update(
+            followings_count=F("followings_count") + delta, updated_at=Now()
+        )
+        UserProfile.objects.filter(created_by_id=following_id).update(
+            followers_count=F("followers_count") + delta, updated_at=Now()
+        )
+        profile_ids = list(
+            UserProfile.objects.filter(
+                created_by_id__in=(created_by_id, following_id)
+            ).values_list("id", flat=True)
+        )
+        transaction.on_commit(
+            lambda: bump_objects("user_profile", profile_ids)
+        )
+
+    @transaction.atomic
+    def perform_create(self, serializer, *args, **kwargs):
+        follow = super().perform_create(serializer, *args, **kwargs)
+        self.update_profile_counters(
+            follow.created_by_id, follow.following_id, 1
+        )
+
+        transaction.on_commit(
+            lambda: timeline_backfill.delay(
+                follow.created_by_id, follow.following_id
+            )
+        )
+
+        return follow
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        previous_following_id = serializer.instance.following_id
+        super().perform_update(serializer)
+        follow = serializer.instance
+
+        if follow.following_id != previous_following_id:
+            self.update_profile_counters(
+                follow.created_by_id, previous_following_id, -1
+            )
+            self.update_profile_counters(
+                follow.created_by_id, follow.following_id, 1
+            )
+            transaction.on_commit(
+                lambda: timeline_prune.delay(
+                    follow.created_by_id, previous_following_id
+                )
+            )
+            transaction.on_commit(
+                lambda: timeline_backfill.delay(
+                    follow.created_by_id, follow.following_id
+                )
+            )
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        owner_id, author_id = instance.created_by_id, instance.following_id
+        super().perform_destroy(instance)
+        self.update_profile_counters(owner_id, author_id, -1)
+
+        transaction.on_commit(
+            lambda: timeline_prune.delay(owner_id, author_id)
+        )